@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Tuple
 
 if TYPE_CHECKING:
     from base.robot import RobotBase
@@ -15,3 +15,15 @@ class LocalizationBase(abc.ABC):
     @abc.abstractmethod
     def act(self, action: RobotBase.Action) -> None:
         pass
+
+    @abc.abstractmethod
+    def estimate(self) -> Tuple[float, float, int]:
+        """Returns the most likely pose of the robot: the x and y coordinates of its center in tiles,
+        and the index of its orientation (see RobotBase.Direction).
+        """
+        pass
+
+    def notify_kidnapped(self) -> None:
+        """Called when the robot was moved without any action, e.g. teleported.
+        """
+        pass
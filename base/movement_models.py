@@ -1,4 +1,6 @@
 import abc
+from typing import Dict, List, Optional, Tuple
+
 from base.robot import RobotBase
 import numpy as np
 
@@ -8,6 +10,9 @@ class InvalidActionException(Exception):
 
 
 class MovementModelBase(abc.ABC):
+    # filters and taps of the actions, computed once per model
+    _filters: Optional[Dict[RobotBase.Action, np.ndarray]] = None
+    _taps: Optional[Dict[RobotBase.Action, List[List[Tuple[int, int, float]]]]] = None
 
     @abc.abstractmethod
     def _get_convolution_forward(self):
@@ -18,10 +23,35 @@ class MovementModelBase(abc.ABC):
         pass
 
     def get_filter(self, action: RobotBase.Action) -> np.ndarray:
-        if action == action.FORWARD:
-            return self._get_convolution_forward()
-
-        if action == action.BACKWARD:
-            return self._get_convolution_backward()
-
-        raise InvalidActionException('Invalid action, turns do not need convolutions.')
+        """Returns the (3, 3, 8) convolution filter of an action, one 3x3 kernel per orientation.
+        The filter is computed once and is read-only.
+        """
+        if action != action.FORWARD and action != action.BACKWARD:
+            raise InvalidActionException('Invalid action, turns do not need convolutions.')
+
+        if self._filters is None:
+            self._filters = {}
+        filter = self._filters.get(action)
+        if filter is None:
+            filter = self._get_convolution_forward() if action == action.FORWARD else self._get_convolution_backward()
+            filter.flags.writeable = False
+            self._filters[action] = filter
+
+        return filter
+
+    def get_taps(self, action: RobotBase.Action) -> List[List[Tuple[int, int, float]]]:
+        """Returns the non-zero entries of the filter of an action, for each orientation, as (dx, dy, weight):
+        convolving a belief with the filter adds weight * belief[x - dx, y - dy] to each pose (x, y).
+        """
+        if self._taps is None:
+            self._taps = {}
+        taps = self._taps.get(action)
+        if taps is None:
+            filter = self.get_filter(action)
+            taps = []
+            for orientation in range(filter.shape[-1]):
+                a, b = np.nonzero(filter[:, :, orientation])
+                taps.append([(int(i) - 1, int(j) - 1, float(filter[i, j, orientation])) for i, j in zip(a, b)])
+            self._taps[action] = taps
+
+        return taps
@@ -24,29 +24,56 @@ class Observer(ABC):
 class Subject:
     """
     The Subject interface declares a set of methods for managing subscribers.
-    """
 
+    Each subject has its own subscribers. Immediate subscribers are updated at each notification, while
+    deferred subscribers (e.g. views) are only marked stale, and updated once by the next flush(),
+    however many notifications happened since the previous one.
     """
-    List of subscribers. In real life, the list of subscribers can be stored
-    more comprehensively (categorized by event type, etc.).
-    """
-    _observers: List[Observer] = []
 
-    def subscribe(self, observer: Observer) -> None:
+    def __init__(self) -> None:
+        # subscribers updated at each notification, and at the next flush
+        self._observers: List[Observer] = []
+        self._deferred: List[Observer] = []
+
+        # whether the deferred subscribers missed a notification since the last flush
+        self._stale = False
+
+    def subscribe(self, observer: Observer, deferred: bool = False) -> None:
         """
         Subscribe an observer to the subject.
+
+        Args:
+            observer (Observer): the subscriber.
+            deferred (bool, optional): whether the observer is only updated by flush(). Defaults to False.
         """
-        self._observers.append(observer)
+        if deferred:
+            self._deferred.append(observer)
+        else:
+            self._observers.append(observer)
 
     def unsubscribe(self, observer: Observer) -> None:
         """
         Unsubscribe an observer from the subject.
         """
-        self._observers.remove(observer)
+        if observer in self._deferred:
+            self._deferred.remove(observer)
+        else:
+            self._observers.remove(observer)
 
     def notify(self) -> None:
         """
-        Notify all observers about an event.
+        Notify the immediate observers about an event, and mark the deferred ones stale.
         """
+        self._stale = True
         for observer in self._observers:
             observer.update()
+
+    def flush(self) -> None:
+        """
+        Update the deferred observers if an event happened since the last flush.
+        """
+        if not self._stale:
+            return
+        self._stale = False
+        for observer in self._deferred:
+            observer.update()
@@ -0,0 +1,140 @@
+import json
+import sys
+import time
+from typing import Dict, Iterable, Optional, TextIO
+
+import numpy as np
+
+from definitions import PROFILE_STEPS, PROFILE_WINDOW, PROFILE_DUMP_INTERVAL, PROFILE_DUMP_PATH
+
+
+class PhaseStats:
+    """Wall time statistics of one phase: total time and call count since the last reset,
+    and the durations of the most recent calls in a ring buffer, for rolling percentiles.
+    """
+
+    def __init__(self, window: int) -> None:
+        self.samples = np.zeros(window)
+        self.count = 0
+        self.total = 0.
+
+    def add(self, seconds: float) -> None:
+        self.samples[self.count % len(self.samples)] = seconds
+        self.count += 1
+        self.total += seconds
+
+    def recent(self) -> np.ndarray:
+        return self.samples[:min(self.count, len(self.samples))]
+
+
+class Phase:
+    """Context manager timing one execution of a phase, recorded into the statistics shared by all the
+    executions of the phase. A new one is used for each execution, so that phases can be nested or re-entered.
+    """
+
+    def __init__(self, profiler: 'StepProfiler', name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+
+
+class NullPhase:
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+class StepProfiler:
+    """Low overhead instrumentation of the robot update loop. Records the wall time and the
+    number of calls of each phase of a step (ray cast, act, see, resample, view notify...):
+
+        with profiler.phase('act'):
+            localization.act(action)
+
+    When disabled, phase() returns a shared no-op context manager.
+    """
+
+    def __init__(self, enabled: bool = False, window: int = 1000, dump_interval: Optional[float] = None,
+                 dump_path: Optional[str] = None) -> None:
+        """
+        Args:
+            enabled (bool, optional): whether the phases are recorded. Defaults to False.
+            window (int, optional): number of recent calls per phase kept for the percentiles.
+            dump_interval (float, optional): when set, the summary is dumped every dump_interval
+            seconds, at the end of a step.
+            dump_path (str, optional): file where the periodic summaries are appended as JSON lines.
+            Defaults to the standard error.
+        """
+        self.enabled = enabled
+        self.window = window
+        self.dump_interval = dump_interval
+        self.dump_path = dump_path
+
+        self.stats: Dict[str, PhaseStats] = {}
+        self._null_phase = NullPhase()
+        self._last_dump = time.perf_counter()
+
+    def phase(self, name: str):
+        if not self.enabled:
+            return self._null_phase
+
+        return Phase(self, name)
+
+    def record(self, name: str, seconds: float) -> None:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = PhaseStats(self.window)
+        stats.add(seconds)
+
+    def step_done(self) -> None:
+        """Called at the end of every step, dumps the summary when the dump interval elapsed.
+        """
+        if not self.enabled or self.dump_interval is None:
+            return
+
+        now = time.perf_counter()
+        if now - self._last_dump >= self.dump_interval:
+            self._last_dump = now
+            if self.dump_path is None:
+                self.dump(sys.stderr)
+            else:
+                with open(self.dump_path, 'a') as f:
+                    self.dump(f)
+
+    def percentiles(self, name: str, q: Iterable[float] = (50, 90, 99)) -> Dict[float, float]:
+        """Rolling percentiles (in seconds) of the durations of the most recent calls of a phase.
+        """
+        stats = self.stats.get(name)
+        if stats is None or stats.count == 0:
+            return {p: float('nan') for p in q}
+
+        return dict(zip(q, np.percentile(stats.recent(), list(q))))
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        summary = {}
+        for name, stats in self.stats.items():
+            p50, p90, p99 = self.percentiles(name).values()
+            summary[name] = {
+                'count': stats.count, 'total': stats.total, 'mean': stats.total / stats.count,
+                'p50': p50, 'p90': p90, 'p99': p99
+            }
+        return summary
+
+    def dump(self, file: TextIO) -> None:
+        file.write(json.dumps({'time': time.time(), 'phases': self.summary()}) + '\n')
+        file.flush()
+
+    def reset(self) -> None:
+        self.stats.clear()
+
+
+# profiler shared by the robots and the localizations, configured by the definitions
+profiler = StepProfiler(PROFILE_STEPS, PROFILE_WINDOW, PROFILE_DUMP_INTERVAL, PROFILE_DUMP_PATH)
@@ -63,7 +63,13 @@ class RobotBase(abc.ABC):
 
     sensor: SensorBase
 
-    on_move: Subject = Subject()
+    """
+    Notified each time the robot moves, each robot has its own subscribers.
+    """
+    on_move: Subject
+
+    def __init__(self) -> None:
+        self.on_move = Subject()
 
     @abc.abstractmethod
     def move(self, action: Action, dt: float):
@@ -103,5 +109,6 @@ class RobotBase(abc.ABC):
                 return 
               
         self.set_position(x // TILE_SIZE, y // TILE_SIZE)
+        self.localization.notify_kidnapped()
         self.sensor.sense(self.position + ROBOT_SIZE, self.orientation)
         self.on_move.notify()
@@ -16,3 +16,10 @@ class SensorBase(abc.ABC):
 
     def true_reading(self, xy: np.ndarray, direction: RobotBase.Direction) -> float:
         return self.sense(xy, direction)
+
+    def true_readings(self, xy: np.ndarray, directions: np.ndarray) -> np.ndarray:
+        """Returns the true readings of a batch of poses, given by an (N, 2) array of
+        coordinates and an (N,) array of direction indices.
+        Sensors that can do better than one true_reading() per pose should override it.
+        """
+        return np.array([self.true_reading(p, RobotBase.Direction(d)) for p, d in zip(xy, directions)])
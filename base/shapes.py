@@ -1,55 +1,49 @@
 import abc
 
-from pyglet import shapes, image, sprite
 from shapely import Point as ShapelyPoint
 from shapely.geometry import Polygon as ShapelyPolygon
 
 
-class DisplayableShape(abc.ABC):
+class Shape(abc.ABC):
+    """
+    Plain geometry of an object of the world. The displayable counterparts of the
+    shapes (see view.shapes) are only created when the world is rendered.
+    """
     shapely_shape = None
+    color = (255, 255, 255)
 
 
-class DisplayableRectangle(shapes.Rectangle, DisplayableShape):
+class Rectangle(Shape):
 
-    def __init__(self, x, y, width, height, color=..., batch=None, group=None):
-        super().__init__(x, y, width, height, color, batch, group)
+    def __init__(self, x, y, width, height, color=(255, 255, 255)):
+        self.x, self.y = x, y
+        self.width, self.height = width, height
+        self.color = color
 
         self.shapely_shape = ShapelyPolygon([[x, y], [x + width, y], [x + width, y + height], [x, y + height]])
 
 
-class DisplayableObstacle(DisplayableRectangle):
-    def __init__(self, x, y, width, height, color=..., textured=True, batch=None, group=None):
-        super().__init__(x, y, width, height, color, batch, group)
+class Obstacle(Rectangle):
+    def __init__(self, x, y, width, height, color=(255, 255, 255), textured=True):
+        super().__init__(x, y, width, height, color)
 
-        self.sprite = None
-        self.batch = batch
-        if textured:
-            self.load_texture()
+        self.textured = textured
 
-    def load_texture(self):
-        original_texture = image.load('./textures/brick_wall.jpg').get_texture()
 
-        # Here, we make the assumption that the size of the texture
-        # is greater than or equal to the size of the rectangle.
-        cropped_texture = original_texture.get_region(0, 0, original_texture.width, original_texture.height)
-
-        self.sprite = sprite.Sprite(cropped_texture, x=self.x, y=self.y, batch=self.batch)
-        self.opacity = 0
-
-        self.sprite.scale_x = self.width / original_texture.width
-        self.sprite.scale_y = self.height / original_texture.height
-
-
-class DisplayableCircle(shapes.Circle, DisplayableShape):
-    def __init__(self, x, y, radius, segments=None, color=..., batch=None, group=None):
-        super().__init__(x, y, radius, segments, color, batch, group)
+class Circle(Shape):
+    def __init__(self, x, y, radius, segments=None, color=(255, 255, 255)):
+        self.x, self.y = x, y
+        self.radius = radius
+        self.segments = segments
+        self.color = color
 
         self.shapely_shape = ShapelyPoint(x, y).buffer(radius)
 
 
-class DisplayablePolygon(shapes.Polygon, DisplayableShape):
+class Polygon(Shape):
 
-    def __init__(self, *coordinates, color=..., batch=None, group=None):
-        super().__init__(*coordinates, color=color, batch=batch, group=group)
+    def __init__(self, *coordinates, color=(255, 255, 255)):
+        self.coordinates = coordinates
+        self.color = color
 
         self.shapely_shape = ShapelyPolygon(coordinates)
@@ -0,0 +1,135 @@
+"""
+Benchmarks of the localization hot paths for the environment and scale selected by the
+definitions (see the LOCALIZATION_ENVIRONMENT and LOCALIZATION_SCALE environment variables).
+Prints the results as a JSON list on the last line of the standard output.
+Use benchmarks/run.py to benchmark all the environments and scales at once.
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from base.robot import RobotBase
+from definitions import *
+from model.continuous_world import ContinuousWorld
+from model.grid_world import GridWorld
+from model.localization import MonteCarloLocalization, UncertainMarkovLocalization
+from model.localization.resampling import RESAMPLERS
+from model.movement_model import UncertainMovementModel
+from model.sensors import LaserSensor, UncertainLaserSensor
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float = 0.05) -> Dict[str, float]:
+    """Times a function, calling it enough times per repetition to last at least min_time seconds.
+
+    Returns:
+        Dict[str, float]: the number of calls per repetition and the best and median time per call.
+    """
+    func()  # warm up
+
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or calls >= 2 ** 16:
+            break
+        calls *= 2
+
+    timings = [elapsed / calls]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        timings.append((time.perf_counter() - start) / calls)
+
+    return {'calls': calls, 'best': min(timings), 'median': statistics.median(timings)}
+
+
+def discrete_benchmarks() -> Dict[str, Callable[[], object]]:
+    world = GridWorld(RES_WIDTH, RES_HEIGHT, TILE_SIZE)
+    sensor = LaserSensor(world, SENSOR_LENGTH)
+    localization = UncertainMarkovLocalization(world, UncertainLaserSensor(world, SENSOR_LENGTH),
+                                               UncertainMovementModel(np.array([0.8, 0.2, 0.0])), cache_dir=None)
+    log_localization = UncertainMarkovLocalization(world, localization.sensor, localization.movement_model,
+                                                   cache_dir=None, log_space=True)
+
+    xy = np.array([ROBOT_START_X, ROBOT_START_Y]) + ROBOT_SIZE
+    measurement = sensor.true_reading(xy, RobotBase.Direction.UP)
+
+    return {
+        'GridWorld._compute_walkable_areas': world._compute_walkable_areas,
+        'LaserSensor.sense': lambda: sensor.sense(xy, RobotBase.Direction.UP_RIGHT),
+        'LaserSensor.true_reading': lambda: sensor.true_reading(xy, RobotBase.Direction.UP_RIGHT),
+        'MarkovLocalization._precompute_measurements': localization._precompute_measurements,
+        'MarkovLocalization.see': lambda: localization.see(measurement),
+        'MarkovLocalization.act[FORWARD]': lambda: localization.act(RobotBase.Action.FORWARD),
+        'MarkovLocalization.act[TURN_LEFT]': lambda: localization.act(RobotBase.Action.TURN_LEFT),
+        'UncertainMarkovLocalization.measurement_probability':
+            lambda: localization.measurement_probability(measurement),
+        'MarkovLocalization.see[log_space]': lambda: log_localization.see(measurement),
+        'MarkovLocalization.act[FORWARD, log_space]': lambda: log_localization.act(RobotBase.Action.FORWARD),
+    }
+
+
+def continuous_benchmarks(num_particles: int) -> Dict[str, Callable[[], object]]:
+    world = ContinuousWorld(RES_WIDTH, RES_HEIGHT, TILE_SIZE)
+    sensor = UncertainLaserSensor(world, SENSOR_LENGTH)
+    localization = MonteCarloLocalization(world, sensor, num_particles)
+    measurement = sensor.true_reading(np.array([ROBOT_START_X, ROBOT_START_Y]) + ROBOT_SIZE, RobotBase.Direction.UP)
+    initial_particles = localization.particles
+    all_particles = np.arange(num_particles)
+
+    def see():
+        # resampling is benchmarked on its own
+        localization.particles = initial_particles.select(all_particles)
+        resample, localization._resample = localization._resample, lambda: None
+        localization.see(measurement)
+        localization._resample = resample
+
+    def resample(resampler: str = 'multinomial'):
+        localization.particles = initial_particles.select(all_particles)
+        localization.particles.normalize_weights()
+        localization.resample_indices = RESAMPLERS[resampler]
+        localization._resample()
+
+    return {
+        'MonteCarloLocalization.see': see,
+        'MonteCarloLocalization.act[FORWARD]': lambda: localization.act(RobotBase.Action.FORWARD),
+        'MonteCarloLocalization.act[TURN_LEFT]': lambda: localization.act(RobotBase.Action.TURN_LEFT),
+        'MonteCarloLocalization._resample': resample,
+        'MonteCarloLocalization._resample[systematic]': lambda: resample('systematic'),
+    }
+
+
+def run(particle_counts: List[int], repeat: int) -> List[Dict[str, object]]:
+    results = []
+
+    def record(benchmarks: Dict[str, Callable[[], object]], particles=None):
+        for name, func in benchmarks.items():
+            np.random.seed(0)
+            results.append({
+                'benchmark': name, 'environment': ENVIRONMENT, 'scale': SCALE, 'particles': particles,
+                **measure(func, repeat)
+            })
+
+    record(discrete_benchmarks())
+    for num_particles in particle_counts:
+        record(continuous_benchmarks(num_particles), num_particles)
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--particles', type=int, nargs='+', default=[100, 1000, 10000],
+                        help="particle counts of the Monte Carlo benchmarks.")
+    parser.add_argument('--repeat', type=int, default=5, help="repetitions of each benchmark.")
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.particles, args.repeat)))
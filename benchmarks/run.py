@@ -0,0 +1,104 @@
+"""
+Runs the hot path benchmarks (see benchmarks/hot_paths.py) for every environment of the
+definitions and several scales, writes the results to a JSON file and optionally compares
+them against a baseline. E.g:
+
+    $ python -m benchmarks.run --output bench.json --save-baseline benchmarks/baseline.json
+    $ python -m benchmarks.run --output bench.json --baseline benchmarks/baseline.json
+
+Exits with status 1 when a benchmark is slower than its baseline by more than the tolerance.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from definitions import DEFINITIONS
+
+
+def result_key(result: Dict[str, object]) -> Tuple:
+    return result['benchmark'], result['environment'], result['scale'], result['particles']
+
+
+def run_configuration(environment: str, scale: int, particles: List[int], repeat: int) -> List[Dict[str, object]]:
+    """Benchmarks an environment at a given scale. The definitions are evaluated on import,
+    so each configuration runs in its own process.
+    """
+    env = dict(os.environ, LOCALIZATION_ENVIRONMENT=environment, LOCALIZATION_SCALE=str(scale))
+    command = [sys.executable, '-m', 'benchmarks.hot_paths', '--repeat', str(repeat),
+               '--particles', *map(str, particles)]
+    output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+
+    return json.loads(output.splitlines()[-1])
+
+
+def compare(results: List[Dict[str, object]], baseline: List[Dict[str, object]], tolerance: float) -> List[str]:
+    """Returns a description of each benchmark slower than its baseline by more than the tolerance.
+    """
+    baseline = {result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        reference = baseline.get(result_key(result))
+        if reference is None:
+            continue
+        ratio = result['median'] / reference['median']
+        if ratio > 1 + tolerance:
+            regressions.append(f"{result['benchmark']} ({result['environment']}, scale {result['scale']}, "
+                               f"particles {result['particles']}): {reference['median']:.3e}s -> "
+                               f"{result['median']:.3e}s (x{ratio:.2f})")
+
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--environments', nargs='+', default=list(DEFINITIONS), choices=list(DEFINITIONS),
+                        help="environments to benchmark. Defaults to all of them.")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 2], help="scales to benchmark.")
+    parser.add_argument('--particles', type=int, nargs='+', default=[100, 1000, 10000],
+                        help="particle counts of the Monte Carlo benchmarks.")
+    parser.add_argument('--repeat', type=int, default=5, help="repetitions of each benchmark.")
+    parser.add_argument('--output', default='bench_output.json', help="file where the results are written.")
+    parser.add_argument('--baseline', help="results of a previous run to compare against.")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="relative slowdown of the median time above which a benchmark regressed.")
+    parser.add_argument('--save-baseline', help="also write the results to this file, to use as baseline.")
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    results = []
+    for environment in args.environments:
+        for scale in args.scales:
+            print(f"benchmarking '{environment}' at scale {scale}", file=sys.stderr)
+            results += run_configuration(environment, scale, args.particles, args.repeat)
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.platform(),
+        },
+        'results': results
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)['results'], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
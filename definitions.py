@@ -1,20 +1,39 @@
+import os
+
 from environments import custom, base_with_obstacle, symmetric_rooms
 from model.definition import Definition
 
 COMMAND_TYPE = 'KEYBOARD'  # KEYBOARD, RANDOM
-FPS = 15
+FPS = 15  # target frame rate of the rendering
 SPEED = 8.2  # tiles per second
+SIM_RATE = 15  # simulation steps per second, each moving the robot by SPEED / SIM_RATE tiles
+SIM_REALTIME = True  # False to step the simulation as fast as possible
 
-SIM_TYPE = 'CONTINUOUS'  # DISCRETE, CONTINUOUS
+SIM_TYPE = os.environ.get('LOCALIZATION_SIM_TYPE', 'CONTINUOUS')  # DISCRETE, CONTINUOUS
 PARTICLE_SIZE = 10.0
 NUM_PARTICLES = 100
 PARTICLE_NOISE = 1.0
 JITTER_RATE = 0.1
+RESAMPLER = 'multinomial'  # multinomial, systematic, stratified, residual
+KLD_SAMPLING = False  # adapt the number of particles to the spread of the belief
+KLD_EPSILON = 0.05  # bound of the KL divergence between the particles and the belief
+KLD_DELTA = 0.01  # probability that the KL divergence exceeds the bound
+KLD_BIN_SIZE = 1  # size in tiles of the bins of KLD-sampling
+KLD_MIN_PARTICLES = 50
+KLD_MAX_PARTICLES = 5000
+RANGE_TABLE_RESOLUTION = None  # samples per tile of the expected range table, None to ray cast
+LOG_SPACE_BELIEF = False  # Markov localization keeps the belief as log-probabilities
+TRACKING_WINDOW = False  # Markov localization only updates a window around the likely poses
+TRACKING_THRESHOLD = 1e-6  # probability above which a pose is kept in the window
+TRACKING_MARGIN = 3  # tiles kept around the likely poses
+TRACKING_MAX_FRACTION = 0.25  # fraction of the grid above which the whole grid is updated
+HIERARCHY_FACTORS = None  # tiles per cell of the levels of a coarse-to-fine Markov localization, e.g. (4, 2, 1)
+HIERARCHY_SAMPLES = 3  # tiles sampled along each axis of a cell to compute its likelihood
 
 # Environment
-SCALE = 1  # must be int
-ENVIRONMENT = "custom"
-defs = {
+SCALE = int(os.environ.get('LOCALIZATION_SCALE', 1))  # must be int
+ENVIRONMENT = os.environ.get('LOCALIZATION_ENVIRONMENT', "custom")
+DEFINITIONS = {
     "custom": Definition(
         width=30,
         height=40,
@@ -55,7 +74,8 @@ defs = {
         robot_start=(9, 9),
         sensor_sig=2.5
     )
-}[ENVIRONMENT]
+}
+defs = DEFINITIONS[ENVIRONMENT]
 
 RES_WIDTH = SCALE * defs.width * defs.tile_size
 RES_HEIGHT = SCALE * defs.height * defs.tile_size
@@ -68,8 +88,25 @@ ROBOT_START_X, ROBOT_START_Y = defs.robot_start
 # Sensor
 SENSOR_LENGTH = SCALE * TILE_SIZE * defs.sensor_len
 MEASUREMENT_SIGMA = SCALE * TILE_SIZE * defs.sensor_sig
+NUM_BEAMS = int(os.environ.get('LOCALIZATION_NUM_BEAMS', 1))  # beams of the laser scanner, 1 for a single beam
+BEAM_SPREAD = 90  # degrees between the first and the last beam
+
+# Precomputations
+OCCUPANCY_RESOLUTION = 4  # cells per tile of the occupancy grid of the continuous world
+MEASUREMENT_CACHE_DIR = 'cache'  # None disables the cache
 
 # Visualization
 GENERATE_PLOTS = defs.generate_plots
 
+# Recording
+RECORD_HISTORY_DIR = None  # directory where the belief or the particles of each step are recorded, None to disable
+RECORD_COMPRESSION = 0  # zlib level of the recorded frames, 0 for raw frames that can be memory mapped
+RECORD_EVERY = 1  # number of steps between two recorded frames
+
+# Instrumentation
+PROFILE_STEPS = os.environ.get('LOCALIZATION_PROFILE', '0') == '1'  # time the phases of each step
+PROFILE_WINDOW = 1000  # number of recent steps used for the rolling percentiles
+PROFILE_DUMP_INTERVAL = None  # seconds between two dumps of the timings, None to disable
+PROFILE_DUMP_PATH = None  # file where the timings are appended as JSON lines, None for stderr
+
 assert RES_HEIGHT % TILE_SIZE == 0 and RES_WIDTH % TILE_SIZE == 0, "Width and height should be a multiple of TILE_SIZE"
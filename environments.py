@@ -1,18 +1,18 @@
-from base.shapes import DisplayableObstacle, DisplayableCircle, DisplayablePolygon
+from base.shapes import Obstacle, Circle, Polygon
 
 color = (151, 151, 151)
 
 custom = [
     (
-        DisplayableObstacle, {"points": [5, 5, 2, 10], "color": color}
+        Obstacle, {"points": [5, 5, 2, 10], "color": color}
     ), (
-        DisplayableObstacle, {"points": [10, 5, 2, 10], "color": color}
+        Obstacle, {"points": [10, 5, 2, 10], "color": color}
     ), (
-        DisplayableObstacle, {"points": [5, 25, 2, 10], "color": color}
+        Obstacle, {"points": [5, 25, 2, 10], "color": color}
     ), (
-        DisplayableObstacle, {"points": [10, 25, 2, 10], "color": color}
+        Obstacle, {"points": [10, 25, 2, 10], "color": color}
     ), (
-        DisplayablePolygon, {
+        Polygon, {
             "points": [[20, 20],
                        [25, 25],
                        [20, 25],
@@ -21,47 +21,47 @@ custom = [
             "color": color
         }
     ), (
-        DisplayableCircle, {"points": [20, 2], "radius": 69, "color": color}
+        Circle, {"points": [20, 2], "radius": 69, "color": color}
     )
 ]
 
 base_with_obstacle = [
     (
-        DisplayableObstacle, {"points": [8, 8, 4, 4], "color": color}
+        Obstacle, {"points": [8, 8, 4, 4], "color": color}
     )
 ]
 
 symmetric_rooms = [
     # horisontal walls
     (
-        DisplayableObstacle, {"points": [1, 10, 15, 1], "color": color, "textured": False}
+        Obstacle, {"points": [1, 10, 15, 1], "color": color, "textured": False}
     ),
     (
-        DisplayableObstacle, {"points": [1, 20, 15, 1], "color": color, "textured": False}
+        Obstacle, {"points": [1, 20, 15, 1], "color": color, "textured": False}
     ),
     (
-        DisplayableObstacle, {"points": [20, 10, 11, 1], "color": color, "textured": False}
+        Obstacle, {"points": [20, 10, 11, 1], "color": color, "textured": False}
     ),
     (
-        DisplayableObstacle, {"points": [20, 20, 11, 1], "color": color, "textured": False}
+        Obstacle, {"points": [20, 20, 11, 1], "color": color, "textured": False}
     ),
     (
-        DisplayableObstacle, {"points": [35, 10, 15, 1], "color": color, "textured": False}
+        Obstacle, {"points": [35, 10, 15, 1], "color": color, "textured": False}
     ),
     (
-        DisplayableObstacle, {"points": [35, 20, 15, 1], "color": color, "textured": False}
+        Obstacle, {"points": [35, 20, 15, 1], "color": color, "textured": False}
     ),
 
     # vertical walls
     (
-        DisplayableObstacle, {"points": [25, 1, 1, 10], "color": color, "textured": False}
+        Obstacle, {"points": [25, 1, 1, 10], "color": color, "textured": False}
     ),
     (
-        DisplayableObstacle, {"points": [25, 20, 1, 10], "color": color, "textured": False}
+        Obstacle, {"points": [25, 20, 1, 10], "color": color, "textured": False}
     ),
     # polygons
     (
-        DisplayablePolygon, {
+        Polygon, {
             "points": [[3, 4],
                        [5, 5],
                        [3, 7],
@@ -71,7 +71,7 @@ symmetric_rooms = [
         }
     ),
     (
-        DisplayablePolygon, {
+        Polygon, {
             "points": [[3, 24],
                        [5, 25],
                        [4, 28],
@@ -82,7 +82,7 @@ symmetric_rooms = [
         }
     ),
     (
-        DisplayablePolygon, {
+        Polygon, {
             "points": [[47, 4],
                        [49, 5],
                        [47, 8],
@@ -93,7 +93,7 @@ symmetric_rooms = [
         }
     ),
     (
-        DisplayablePolygon, {
+        Polygon, {
             "points": [[47, 24],
                        [49, 25],
                        [48, 28],
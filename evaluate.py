@@ -0,0 +1,71 @@
+"""
+Evaluates the localization over many independent episodes, from random start poses with random
+actions and optional kidnapping, in parallel over all the CPUs. Writes one JSON line per episode
+as soon as it completes, then prints a summary. E.g:
+
+    $ python evaluate.py --sim-type CONTINUOUS --episodes 1000 --steps 300 --kidnap-probability 0.005 \
+        --output results.jsonl
+"""
+
+import argparse
+import json
+import os
+import sys
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Evaluate the localization over many episodes.")
+    parser.add_argument('--sim-type', choices=['DISCRETE', 'CONTINUOUS'],
+                        help="DiscreteRobot with Markov localization or ContinuousRobot with Monte Carlo "
+                             "localization. Defaults to SIM_TYPE of the definitions.")
+    parser.add_argument('--environment', help="one of the environments of the definitions.")
+    parser.add_argument('--scale', type=int, help="scaling of the environment.")
+    parser.add_argument('--episodes', type=int, default=100, help="number of episodes. Defaults to 100.")
+    parser.add_argument('--steps', type=int, default=300, help="number of steps per episode. Defaults to 300.")
+    parser.add_argument('--kidnap-probability', type=float, default=0.,
+                        help="probability of kidnapping the robot at each step. Defaults to 0.")
+    parser.add_argument('--threshold', type=float, default=1.,
+                        help="error in tiles below which the robot is localized. Defaults to 1.")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the episode seeds. Defaults to 0.")
+    parser.add_argument('--processes', type=int, help="number of worker processes. Defaults to the number of CPUs.")
+    parser.add_argument('--output', help="JSON lines file of the results. Defaults to the standard output.")
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    # the definitions are evaluated on import, so the overrides must be set beforehand
+    for variable, value in (('LOCALIZATION_SIM_TYPE', args.sim_type),
+                            ('LOCALIZATION_ENVIRONMENT', args.environment),
+                            ('LOCALIZATION_SCALE', args.scale)):
+        if value is not None:
+            os.environ[variable] = str(value)
+    # the episodes run in parallel, a single thread per process avoids oversubscribing the CPUs
+    for variable in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ.setdefault(variable, '1')
+
+    import numpy as np
+
+    from definitions import SIM_TYPE, ENVIRONMENT, SCALE
+    from simulation.evaluation import evaluate
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    results = []
+    try:
+        for result in evaluate(SIM_TYPE, args.episodes, args.steps, args.kidnap_probability, args.threshold,
+                               args.seed, args.processes):
+            results.append(result)
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    converged = [r['convergence_step'] for r in results if r['convergence_step'] is not None]
+    print(f"{SIM_TYPE} localization on '{ENVIRONMENT}' (scale {SCALE}): {len(results)} episodes of "
+          f"{args.steps} steps, {len(converged) / len(results):.1%} localized, "
+          f"median convergence step {np.median(converged) if converged else float('nan'):.0f}, "
+          f"mean final error {np.mean([r['final_error'] for r in results]):.2f} tiles, "
+          f"{np.mean([r['time_per_step'] for r in results]) * 1e3:.2f} ms/step", file=sys.stderr)
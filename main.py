@@ -8,36 +8,36 @@ from pyglet.window import key
 
 import os
 
-from model.robots import DiscreteRobot, ContinuousRobot
-from model.grid_world import GridWorld
-from model.continuous_world import ContinuousWorld
-from model.movement_model import UncertainMovementModel, MovementModel
-from model.localization import MarkovLocalization, MonteCarloLocalization, UncertainMarkovLocalization
-from model.sensors import UncertainLaserSensor, LaserSensor
+from model.robots import DiscreteRobot
+from simulation.engine import Simulation
+from simulation.recorder import HistoryRecorder
+from simulation.scheduler import FixedStepScheduler
 
 from view.robot import RobotView
 from view.laser_sensor import LaserSensorView
 from view.probs_grid import LocalizationBeliefView
 from view.probs_particle import ParticleView
+from view.world import WorldView
 
 
-def update(dt: float) -> None:
+def update() -> None:
+    # the views are not updated here: the moves of the robot notify them, and on_draw flushes the
+    # notifications once per frame
     if not robot_view.allow_move:
-        robot_view.update()
+        return
     elif COMMAND_TYPE == 'KEYBOARD':
-        robot_view.update()
         if keys[key.UP]:
-            robot.move(DiscreteRobot.Action.FORWARD, dt)
+            robot.move(DiscreteRobot.Action.FORWARD, 1 / SIM_RATE)
         elif keys[key.DOWN]:
-            robot.move(DiscreteRobot.Action.BACKWARD, dt)
+            robot.move(DiscreteRobot.Action.BACKWARD, 1 / SIM_RATE)
         elif keys[key.LEFT]:
-            robot.move(DiscreteRobot.Action.TURN_LEFT, dt)
+            robot.move(DiscreteRobot.Action.TURN_LEFT, 1 / SIM_RATE)
         elif keys[key.RIGHT]:
-            robot.move(DiscreteRobot.Action.TURN_RIGHT, dt)
+            robot.move(DiscreteRobot.Action.TURN_RIGHT, 1 / SIM_RATE)
     else:
         r = np.random.random()
 
-        robot.move(DiscreteRobot.Action(int(r * 4)), dt)
+        robot.move(DiscreteRobot.Action(int(r * 4)), 1 / SIM_RATE)
 
 
 if __name__ == '__main__':
@@ -62,23 +62,23 @@ if __name__ == '__main__':
 
     # region Variable Initializations
 
+    simulation = Simulation(SIM_TYPE)
+    world, sensor, localization, robot = simulation.world, simulation.sensor, simulation.localization, simulation.robot
+
+    world_view = WorldView(world, env_batch)
     if SIM_TYPE == "DISCRETE":
-        world = GridWorld(RES_WIDTH, RES_HEIGHT, TILE_SIZE, env_batch)
-        sensor = UncertainLaserSensor(world, SENSOR_LENGTH)
-        localization = UncertainMarkovLocalization(world, sensor, UncertainMovementModel(np.array([0.8, 0.2, 0.0])))
-        robot = DiscreteRobot(world, ROBOT_START_X, ROBOT_START_Y, sensor, localization)
         probabilities_view = LocalizationBeliefView(robot, world, env_batch)
-
-    elif SIM_TYPE == "CONTINUOUS":
-        world = ContinuousWorld(RES_WIDTH, RES_HEIGHT, TILE_SIZE, env_batch)
-        sensor = UncertainLaserSensor(world, SENSOR_LENGTH)
-        localization = MonteCarloLocalization(world, sensor, NUM_PARTICLES)
-        robot = ContinuousRobot(world, ROBOT_START_X, ROBOT_START_Y, sensor, localization)
+    else:
         probabilities_view = ParticleView(localization, robot, env_batch)
 
     robot_view = RobotView(robot, rob_batch)
     laser_view = LaserSensorView(robot, sensor, rob_batch)
 
+    recorder = None
+    if RECORD_HISTORY_DIR:
+        recorder = HistoryRecorder(robot, RECORD_HISTORY_DIR, RECORD_COMPRESSION, RECORD_EVERY,
+                                   sim_type=SIM_TYPE, environment=ENVIRONMENT, scale=SCALE)
+
     # endregion
 
     # region Pyglet Run
@@ -90,11 +90,25 @@ if __name__ == '__main__':
 
     @window.event
     def on_draw():
+        # the views are redrawn at most once per frame, however many times the robot moved, and not at all
+        # while the simulation is behind, so that heavy frames do not slow it down further
+        if scheduler.should_render():
+            robot.on_move.flush()
         window.clear()
         env_batch.draw()
         rob_batch.draw()
 
-    pyglet.clock.schedule_interval(update, 1/FPS)
-    app.run()
+    # the simulation steps at its own rate, independently of the rendering at FPS
+    scheduler = FixedStepScheduler(update, SIM_RATE if SIM_REALTIME else None, budget=1 / FPS)
+    if SIM_REALTIME:
+        pyglet.clock.schedule_interval(scheduler.tick, 1 / SIM_RATE)
+    else:
+        pyglet.clock.schedule(scheduler.tick)
+    app.run(1 / FPS)
+
+    if isinstance(probabilities_view, LocalizationBeliefView):
+        probabilities_view.close()
+    if recorder is not None:
+        recorder.close()
 
     # endregion
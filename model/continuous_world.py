@@ -1,40 +1,56 @@
 from typing import List, Tuple
 
 import numpy as np
+from shapely import STRtree
 from shapely.geometry import Point as ShapelyPoint
 
-from base.shapes import DisplayableRectangle
-from definitions import defs, TILE_SIZE
+from base.shapes import Rectangle
+from definitions import defs, TILE_SIZE, OCCUPANCY_RESOLUTION
+from model.occupancy_grid import OccupancyGrid
 
 
 class ContinuousWorld:
-    def __init__(self, width: int, height: int, tile_size, batch) -> None:
+    def __init__(self, width: int, height: int, tile_size) -> None:
         self.height, self.width = height, width
-        self.batch = batch
 
         self.objects = []
         for obj, kwargs in defs.objects:
+            kwargs = dict(kwargs)
             points = (np.array(kwargs.pop("points")) * tile_size).tolist()
-            self.objects.append(obj(*points, **kwargs, batch=batch))
+            self.objects.append(obj(*points, **kwargs))
 
-        self.objects += self._get_walls(width, height, (255, 255, 255), batch)
+        self.objects += self._get_walls(width, height, (255, 255, 255))
 
-    def _get_walls(self, width: int, height: int, color: Tuple[int, int, int], batch) -> List[DisplayableRectangle]:
+        # spatial index over the shapes of the objects, in the same order as self.objects
+        self.index = STRtree([obj.shapely_shape for obj in self.objects])
+        self.occupancy = OccupancyGrid(self.index, width, height, tile_size / OCCUPANCY_RESOLUTION)
+
+    def _get_walls(self, width: int, height: int, color: Tuple[int, int, int]) -> List[Rectangle]:
         return [
-            DisplayableRectangle(0, 0, width, TILE_SIZE, color=color, batch=batch),
-            DisplayableRectangle(0, 0, TILE_SIZE, height, color=color, batch=batch),
-            DisplayableRectangle(width - TILE_SIZE, 0, TILE_SIZE, height, color=color, batch=batch),
-            DisplayableRectangle(0, height - TILE_SIZE, width, TILE_SIZE, color=color, batch=batch)
+            Rectangle(0, 0, width, TILE_SIZE, color=color),
+            Rectangle(0, 0, TILE_SIZE, height, color=color),
+            Rectangle(width - TILE_SIZE, 0, TILE_SIZE, height, color=color),
+            Rectangle(0, height - TILE_SIZE, width, TILE_SIZE, color=color)
         ]
 
     def is_occupied(self, x: float, y: float) -> bool:
-        point = ShapelyPoint(x, y)
+        # the occupancy grid answers directly, unless the point is close to the boundary of an object
+        state = self.occupancy.cell_state(x, y)
+        if state != OccupancyGrid.BOUNDARY:
+            return state == OccupancyGrid.OCCUPIED
 
-        for obj in self.objects:
-            if obj.shapely_shape.contains(point):
-                return True
+        # only the objects whose bounding box contains the point are tested
+        return len(self.index.query(ShapelyPoint(x, y), predicate='within')) > 0
 
-        return False
+    def is_occupied_batch(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Vectorized version of is_occupied() for arrays of coordinates.
+        """
+        return self.occupancy.is_occupied(x, y)
 
     def check_within_boundaries(self, x: float, y: float) -> bool:
         return 0 <= x <= self.width and 0 <= y <= self.height
+
+    def check_within_boundaries_batch(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Vectorized version of check_within_boundaries() for arrays of coordinates.
+        """
+        return (0 <= x) & (x <= self.width) & (0 <= y) & (y <= self.height)
@@ -1,59 +1,62 @@
 from typing import List, Tuple
 
 import numpy as np
-from shapely.geometry import Polygon as ShapelyPolygon
+import shapely
+from shapely import STRtree
 
-from base.shapes import DisplayableRectangle
+from base.shapes import Rectangle
 from definitions import defs
 
 
 class GridWorld:
 
-    def __init__(self, width: int, height: int, tile_size, batch) -> None:
+    def __init__(self, width: int, height: int, tile_size) -> None:
         self.tile_size = tile_size
         self.height, self.width = np.array([height, width]) // tile_size
-        self.batch = batch
 
         self.objects = []
         for obj, kwargs in defs.objects:
+            kwargs = dict(kwargs)
             points = (np.array(kwargs.pop("points")) * tile_size).tolist()
-            self.objects.append(obj(*points, **kwargs, batch=batch))
+            self.objects.append(obj(*points, **kwargs))
 
-        self.objects += self._get_walls(width, height, (255, 255, 255), batch)
+        self.objects += self._get_walls(width, height, (255, 255, 255))
+
+        # spatial index over the shapes of the objects, in the same order as self.objects
+        self.index = STRtree([obj.shapely_shape for obj in self.objects])
 
         self.walkable = self._compute_walkable_areas()
 
-    def _get_walls(self, width: int, height: int, color: Tuple[int, int, int], batch) -> List[DisplayableRectangle]:
+    def _get_walls(self, width: int, height: int, color: Tuple[int, int, int]) -> List[Rectangle]:
         return [
-            DisplayableRectangle(0, 0, width, self.tile_size, color=color, batch=batch),
-            DisplayableRectangle(0, 0, self.tile_size, height, color=color, batch=batch),
-            DisplayableRectangle(width - self.tile_size, 0, self.tile_size, height, color=color, batch=batch),
-            DisplayableRectangle(0, height - self.tile_size, width, self.tile_size, color=color, batch=batch)
+            Rectangle(0, 0, width, self.tile_size, color=color),
+            Rectangle(0, 0, self.tile_size, height, color=color),
+            Rectangle(width - self.tile_size, 0, self.tile_size, height, color=color),
+            Rectangle(0, height - self.tile_size, width, self.tile_size, color=color)
         ]
 
     def _compute_walkable_areas(self):
         """
-        Returns a dictionary containing a pair (i,j) when the corresponding tile
-        as indices i,j contains an object. The robot can not go on those tiles.
+        Returns a boolean mask of shape (width, height), False where the tile at indices i,j
+        overlaps an object. The robot can not go on those tiles.
         """
-        width = self.tile_size - 2
         walkable = np.ones((self.width, self.height), dtype=bool)
-        for i in range(self.width):
-            for j in range(self.height):
-                x, y = np.array([i, j]) * self.tile_size
-
-                # create a fake robot body,
-                # of 1 pixel smaller in each direction (e.g 9x9 instead of 10x10)
-                robot_body = ShapelyPolygon([[x + 1, y + 1],
-                                             [x + 1 + width, y + 1],
-                                             [x + 1 + width, y + width + 1],
-                                             [x + 1, y + width + 1]])
-
-                # For each object in the world, check whether the fake body would
-                # intersect or be contained by the object
-                for o in self.objects:
-                    if o.shapely_shape.contains(robot_body) or o.shapely_shape.intersects(robot_body):
-                        walkable[i, j] = False
-                        break
+        for shape in self.index.geometries:
+            # only the tiles within the bounds of the object can overlap it
+            min_x, min_y, max_x, max_y = shape.bounds
+            i0, j0 = max(int(min_x // self.tile_size), 0), max(int(min_y // self.tile_size), 0)
+            i1 = min(int(max_x // self.tile_size) + 1, self.width)
+            j1 = min(int(max_y // self.tile_size) + 1, self.height)
+            if i0 >= i1 or j0 >= j1:
+                continue
+
+            # create fake robot bodies, of 1 pixel smaller in each direction than the tiles
+            # (e.g 18x18 instead of 20x20), and check whether they would intersect
+            # (or be contained by) the object
+            i, j = np.meshgrid(np.arange(i0, i1), np.arange(j0, j1), indexing='ij')
+            x, y = i * self.tile_size, j * self.tile_size
+            robot_bodies = shapely.box(x + 1, y + 1, x + self.tile_size - 1, y + self.tile_size - 1)
+
+            walkable[i0:i1, j0:j1] &= ~shapely.intersects(shape, robot_bodies)
 
         return walkable
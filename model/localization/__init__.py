@@ -1,3 +1,4 @@
 from model.localization.markov_localization import MarkovLocalization
 from model.localization.uncertain_markov_localization import UncertainMarkovLocalization
+from model.localization.hierarchical_markov_localization import HierarchicalMarkovLocalization
 from model.localization.monte_carlo_localization import MonteCarloLocalization
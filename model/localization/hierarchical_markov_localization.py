@@ -0,0 +1,376 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from base.localization import LocalizationBase
+from base.movement_models import InvalidActionException, MovementModelBase
+from base.robot import RobotBase
+from base.sensor import SensorBase
+from definitions import MEASUREMENT_CACHE_DIR, ROBOT_SIZE, TRACKING_THRESHOLD, TRACKING_MARGIN, TRACKING_MAX_FRACTION
+from model.grid_world import GridWorld
+from model.localization.markov_localization import motion_update, orientation_slices
+from model.localization.measurement_cache import load_or_compute, measurement_cache_key
+
+
+def block_sum(array: np.ndarray, factor: int) -> np.ndarray:
+    """Sums the blocks of factor x factor cells along the axes 1 and 2 of an array,
+    padding the array with zeros when its size is not a multiple of the factor.
+    """
+    width, height = array.shape[1:3]
+    coarse_width, coarse_height = -(-width // factor), -(-height // factor)
+    padding = [(0, 0), (0, coarse_width * factor - width), (0, coarse_height * factor - height)]
+    array = np.pad(array, padding + [(0, 0)] * (array.ndim - 3))
+
+    shape = (array.shape[0], coarse_width, factor, coarse_height, factor) + array.shape[3:]
+    return array.reshape(shape).sum(axis=(2, 4))
+
+
+def cell_samples(walkable: np.ndarray, factor: int, samples: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Picks up to samples x samples walkable tiles of each cell of factor x factor tiles, spread over the cell
+    when it is mostly walkable, or all of them when it holds fewer walkable tiles.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: the (width, height, K) x and y coordinates of the tiles sampled
+        in each cell of the grid, and their weights, 1 / the number of samples of the cell or 0 for no sample.
+    """
+    per_axis = min(samples, factor)
+    k = per_axis ** 2
+    width, height = walkable.shape
+    coarse_width, coarse_height = -(-width // factor), -(-height // factor)
+
+    padded = np.zeros((coarse_width * factor, coarse_height * factor), dtype=bool)
+    padded[:width, :height] = walkable
+    tiles = padded.reshape(coarse_width, factor, coarse_height, factor).transpose(0, 2, 1, 3)
+    tiles = tiles.reshape(coarse_width, coarse_height, factor * factor)
+
+    # the tiles of a regular grid over the cell are picked first, then the other walkable tiles
+    priority = np.arange(factor * factor).reshape(factor, factor) + k
+    offsets = ((np.arange(per_axis) + 0.5) * factor / per_axis).astype(int)
+    priority[np.ix_(offsets, offsets)] = np.arange(k).reshape(per_axis, per_axis)
+    picked = np.argsort(np.where(tiles, priority.ravel(), 2 * factor * factor), axis=-1, kind='stable')[..., :k]
+
+    count = np.minimum(tiles.sum(axis=-1), k)[..., None]
+    weights = (np.arange(k) < count) / np.maximum(count, 1)
+    x = np.arange(coarse_width)[:, None, None] * factor + picked // factor
+    y = np.arange(coarse_height)[None, :, None] * factor + picked % factor
+
+    return x, y, weights
+
+
+def sample_measurements(sensor: SensorBase, x: np.ndarray, y: np.ndarray, sampled: np.ndarray) -> np.ndarray:
+    """Returns the true measurements of the sampled tiles of cells (see cell_samples()), as an (8, width, height, K)
+    array, with a trailing beam axis for multi-beam sensors. The measurements of the other samples hold 0.
+    """
+    orientations = 8
+
+    # cast the rays of every sampled pose in a single batch
+    a, b, k = (np.repeat(index, orientations) for index in np.nonzero(sampled))
+    d = np.tile(np.arange(orientations), len(a) // orientations)
+    beams = (sensor.num_beams,) if hasattr(sensor, 'num_beams') else ()
+    if len(a) == 0:
+        return np.zeros((orientations,) + x.shape + beams)
+
+    readings = sensor.true_readings(np.stack([x[a, b, k], y[a, b, k]], axis=1) + ROBOT_SIZE, d)
+    measurements = np.zeros((orientations,) + x.shape + beams)
+    measurements[d, a, b, k] = readings
+
+    return measurements
+
+
+def coarse_taps(taps: List[List[Tuple[int, int, float]]], factor: int) -> List[List[Tuple[int, int, float]]]:
+    """Scales the taps of a motion filter to cells of factor x factor tiles: a move of one tile
+    along an axis brings 1 / factor of the probability of a cell to the neighbouring cell.
+    """
+    def split(d: int) -> List[Tuple[int, float]]:
+        return [(0, 1.)] if d == 0 else [(d, 1 / factor), (0, 1 - 1 / factor)]
+
+    scaled = []
+    for orientation_taps in taps:
+        weights = {}
+        for dx, dy, weight in orientation_taps:
+            for ex, fx in split(dx):
+                for ey, fy in split(dy):
+                    weights[ex, ey] = weights.get((ex, ey), 0.) + weight * fx * fy
+        scaled.append([(ex, ey, weight) for (ex, ey), weight in weights.items() if weight > 0])
+
+    return scaled
+
+
+class GridLevel:
+    """One level of the pyramid of a HierarchicalMarkovLocalization: a grid of cells of factor x factor tiles.
+    The likelihood of a measurement in a cell is the mean likelihood of the sensor over a few walkable tiles
+    sampled in the cell (see cell_samples()). The belief of a level covers a window of the grid, with the
+    slots of the orientations of the localization, and is None while the level is inactive.
+    """
+
+    """
+    Number of cells along each axis of the blocks of measurements computed on demand.
+    """
+    BLOCK_SIZE = 16
+
+    def __init__(self, factor: int, walkable: np.ndarray, sensor: SensorBase, samples: int,
+                 measurements: Optional[np.ndarray] = None) -> None:
+        """
+        Args:
+            factor (int): the number of tiles of a cell along each axis.
+            walkable (np.ndarray): (width, height) walkable tiles of the world.
+            sensor (SensorBase): the sensor of the robot.
+            samples (int): the maximum number of tiles sampled in each cell, along each axis.
+            measurements (np.ndarray, optional): the true measurements of the samples of all the cells
+            (see sample_measurements()). By default, they are computed on demand for the windows of the level.
+        """
+        self.factor = factor
+        self.sensor = sensor
+
+        count = block_sum(walkable[None].astype(float), factor)[0]
+        self.walkable = count > 0
+        self.blocked = ~self.walkable
+
+        # share of the probability of a cell held by each of its walkable tiles
+        tile_count = np.repeat(np.repeat(np.maximum(count, 1), factor, axis=0), factor, axis=1)
+        self.tile_share = walkable / tile_count[:walkable.shape[0], :walkable.shape[1]]
+
+        self.sample_x, self.sample_y, self.sample_weights = cell_samples(walkable, factor, samples)
+        self.measurements = measurements
+        self._blocks: Dict[Tuple[int, int], np.ndarray] = {}
+        self._taps = {}
+
+        self.region: Tuple[slice, slice, slice] = (slice(None), slice(0, 0), slice(0, 0))
+        self.belief: Optional[np.ndarray] = None
+        self._window_measurements: Optional[np.ndarray] = None
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.walkable.shape
+
+    def activate(self, window: Tuple[slice, slice, slice], belief: np.ndarray) -> None:
+        self.region = window
+        self.belief = belief
+        self._window_measurements = self.measurements_in(window[1], window[2])
+        self.mask_and_normalize()
+
+    def deactivate(self) -> None:
+        self.region = (slice(None), slice(0, 0), slice(0, 0))
+        self.belief = None
+        self._window_measurements = None
+
+    def full_belief(self) -> np.ndarray:
+        """Returns the (8, width, height) belief over the whole grid of the level, 0 outside of the window.
+        """
+        belief = np.zeros((8,) + self.shape)
+        belief[self.region] = self.belief
+        return belief
+
+    def measurements_in(self, xs: slice, ys: slice) -> np.ndarray:
+        """Returns the true measurements of the samples of the cells within the slices, computing the blocks
+        of cells that were not computed yet.
+        """
+        if self.measurements is not None:
+            return self.measurements[:, xs, ys]
+
+        size = self.BLOCK_SIZE
+        x_min, x_max, _ = xs.indices(self.shape[0])
+        y_min, y_max, _ = ys.indices(self.shape[1])
+        columns = [
+            np.concatenate([self._block(bx, by) for by in range(y_min // size, (y_max - 1) // size + 1)], axis=2)
+            for bx in range(x_min // size, (x_max - 1) // size + 1)
+        ]
+        x0, y0 = x_min // size * size, y_min // size * size
+        return np.concatenate(columns, axis=1)[:, x_min - x0:x_max - x0, y_min - y0:y_max - y0]
+
+    def _block(self, bx: int, by: int) -> np.ndarray:
+        if (bx, by) not in self._blocks:
+            size = self.BLOCK_SIZE
+            cells = np.s_[bx * size:(bx + 1) * size, by * size:(by + 1) * size]
+            self._blocks[bx, by] = sample_measurements(self.sensor, self.sample_x[cells], self.sample_y[cells],
+                                                       self.sample_weights[cells] > 0)
+        return self._blocks[bx, by]
+
+    def mask_and_normalize(self) -> None:
+        self.belief[:, self.blocked[self.region[1:]]] = 0
+        self.belief /= self.belief.sum()
+
+    def act(self, action: RobotBase.Action, taps: List[List[Tuple[int, int, float]]], heading_offset: int) -> None:
+        if action not in self._taps:
+            self._taps[action] = coarse_taps(taps, self.factor)
+
+        moved = np.empty_like(self.belief)
+        motion_update(self._taps[action], self.belief, moved, heading_offset)
+        self.belief = moved
+        self.mask_and_normalize()
+
+    def see(self, measurement, heading_offset: int) -> None:
+        # mean likelihood of the samples of each cell, the likelihoods of the sensors reduce the beam axis
+        likelihood = self.sensor.likelihood(self._window_measurements, measurement)
+        likelihood = (likelihood * self.sample_weights[self.region[1:]]).sum(axis=-1)
+        for slots, orientations in orientation_slices(heading_offset):
+            self.belief[slots] *= likelihood[orientations]
+
+        self.belief /= self.belief.sum()
+        # make sure no probs go to zero bc of machine imprecision
+        self.belief += 2e-16
+        self.mask_and_normalize()
+
+
+class HierarchicalMarkovLocalization(LocalizationBase):
+    """Represents a coarse-to-fine Markov Localization, with the likelihood of the sensor of the robot.
+
+    The poses are discretized by a pyramid of grids, from cells of factors[0] x factors[0] tiles down to
+    single tiles. The coarsest level always covers the whole world and localizes the robot globally. Each
+    finer level is only active once the belief of the level above collapsed, and then only covers a window
+    around the cells of the level above holding a probability above TRACKING_THRESHOLD.
+
+    Only the measurements of the tiles sampled in the cells of the coarsest level are precomputed (and cached),
+    those of the finer levels are computed on demand, for the windows they cover. As in MarkovLocalization,
+    the beliefs of all the levels keep the orientation o in the slot (o + heading_offset) % 8, such that
+    turning only changes the offset.
+    """
+
+    def __init__(self, world: GridWorld, sensor: SensorBase, movement_model: MovementModelBase,
+                 factors: Sequence[int] = (4, 2, 1), samples: int = 3,
+                 cache_dir: Optional[str] = MEASUREMENT_CACHE_DIR) -> None:
+        """Initializes the localization with a uniform belief over the walkable poses of the coarsest level.
+
+        Args:
+            world (GridWorld): the world where the robot resides.
+            sensor (SensorBase): the sensor of the robot.
+            movement_model (MovementModelBase): the movement model of the robot.
+            factors (Sequence[int], optional): the number of tiles per cell of each level, from the coarsest
+            to the finest. Each factor must divide the previous one, and the last one must be 1.
+            Defaults to (4, 2, 1).
+            samples (int, optional): the maximum number of tiles sampled in each cell along each axis, to compute
+            the likelihood of a cell. Sensors without noise need samples >= factors[0]. Defaults to 3.
+            cache_dir (str, optional): directory where the measurements of the coarsest level are cached
+            across runs. None disables the cache. Defaults to MEASUREMENT_CACHE_DIR.
+        """
+        if factors[-1] != 1 or any(coarse % fine for coarse, fine in zip(factors, factors[1:])):
+            raise ValueError(f"Invalid factors {factors}: each factor must divide the previous one and end with 1")
+
+        self.world = world
+        self.sensor = sensor
+        self.movement_model = movement_model
+        self.heading_offset = 0
+
+        self.levels = [GridLevel(factor, world.walkable, sensor, samples) for factor in factors]
+
+        coarsest = self.levels[0]
+        key = f"{measurement_cache_key(world, sensor)}-cells-{coarsest.factor}-{coarsest.sample_x.shape[-1]}"
+        coarsest.measurements = load_or_compute(
+            cache_dir, key, world.walkable,
+            lambda: sample_measurements(sensor, coarsest.sample_x, coarsest.sample_y, coarsest.sample_weights > 0))
+        coarsest.activate((slice(None), slice(None), slice(None)), np.ones((8,) + coarsest.shape))
+
+    @property
+    def active_levels(self) -> List[GridLevel]:
+        return [level for level in self.levels if level.belief is not None]
+
+    @property
+    def belief(self) -> np.ndarray:
+        """The probabilities of the poses, an array of shape (width, height, 8), given by the finest active level.
+        """
+        level = self.active_levels[-1]
+        belief = level.full_belief()[(np.arange(8) + self.heading_offset) % 8]
+        belief = np.repeat(np.repeat(belief, level.factor, axis=1), level.factor, axis=2)
+        belief = belief[:, :self.world.width, :self.world.height] * level.tile_share
+
+        return np.moveaxis(belief, 0, -1)
+
+    def estimate(self) -> Tuple[float, float, int]:
+        # center of the most likely cell of the finest active level
+        level = self.active_levels[-1]
+        slot, i, j = np.unravel_index(np.argmax(level.belief), level.belief.shape)
+        center = (level.factor - 1) / 2 + ROBOT_SIZE
+        x = ((level.region[1].start or 0) + i) * level.factor + center
+        y = ((level.region[2].start or 0) + j) * level.factor + center
+        return x, y, int((slot - self.heading_offset) % 8)
+
+    def notify_kidnapped(self) -> None:
+        # localize globally again, from the coarsest level
+        for level in self.levels[1:]:
+            level.deactivate()
+
+    def act(self, action: RobotBase.Action) -> None:
+        try:
+            taps = self.movement_model.get_taps(action)
+        except InvalidActionException:
+            # rotate the slots of the orientations of all the levels instead of their beliefs
+            direction = 1 if action == action.TURN_RIGHT else -1
+            self.heading_offset = (self.heading_offset - direction) % 8
+            return
+
+        for level in self.active_levels:
+            level.act(action, taps, self.heading_offset)
+
+    def see(self, measurement) -> None:
+        for level in self.active_levels:
+            level.see(measurement, self.heading_offset)
+
+        self._refine()
+
+    def _refine(self) -> None:
+        """Activates, moves or deactivates the window of each level below the coarsest one,
+        according to the likely cells of the level above.
+        """
+        for parent, level in zip(self.levels, self.levels[1:]):
+            if parent.belief is None:
+                level.deactivate()
+                continue
+
+            window = self._window(parent, level)
+            if window is None:
+                level.deactivate()
+                continue
+
+            if level.region != window:
+                level.activate(window, self._initial_belief(parent, level, window))
+
+    @staticmethod
+    def _window(parent: GridLevel, level: GridLevel) -> Optional[Tuple[slice, slice, slice]]:
+        """Returns the window of the level around the likely cells of its parent, or None if the window
+        would cover more than TRACKING_MAX_FRACTION of the level.
+        """
+        likely = parent.belief.max(axis=0) > TRACKING_THRESHOLD
+        i, = np.nonzero(likely.any(axis=1))
+        j, = np.nonzero(likely.any(axis=0))
+        if len(i) == 0:
+            return None
+
+        ratio = parent.factor // level.factor
+        x0, y0 = parent.region[1].start or 0, parent.region[2].start or 0
+        width, height = level.shape
+        x_min = max((x0 + i[0]) * ratio - TRACKING_MARGIN, 0)
+        x_max = min((x0 + i[-1] + 1) * ratio + TRACKING_MARGIN, width)
+        y_min = max((y0 + j[0]) * ratio - TRACKING_MARGIN, 0)
+        y_max = min((y0 + j[-1] + 1) * ratio + TRACKING_MARGIN, height)
+
+        if (x_max - x_min) * (y_max - y_min) > TRACKING_MAX_FRACTION * width * height:
+            return None
+        return slice(None), slice(x_min, x_max), slice(y_min, y_max)
+
+    @staticmethod
+    def _initial_belief(parent: GridLevel, level: GridLevel, window: Tuple[slice, slice, slice]) -> np.ndarray:
+        """Returns the belief of a level over a new window: the probabilities of the parent cells, spread over
+        their walkable child cells, where the level already had a belief, its own, rescaled to the same mass.
+        """
+        ratio = parent.factor // level.factor
+        _, xs, ys = window
+        parent_x, parent_y = np.arange(xs.start, xs.stop) // ratio, np.arange(ys.start, ys.stop) // ratio
+
+        # number of walkable child cells of each parent cell
+        children = block_sum(level.walkable[None].astype(float), ratio)[0]
+        share = level.walkable[xs, ys] / np.maximum(children[np.ix_(parent_x, parent_y)], 1)
+        belief = parent.full_belief()[:, parent_x[:, None], parent_y[None, :]] * share
+
+        if level.belief is not None:
+            # keep the finer belief where the windows overlap
+            _, old_xs, old_ys = level.region
+            x_min, x_max = max(xs.start, old_xs.start), min(xs.stop, old_xs.stop)
+            y_min, y_max = max(ys.start, old_ys.start), min(ys.stop, old_ys.stop)
+            if x_min < x_max and y_min < y_max:
+                new = belief[:, x_min - xs.start:x_max - xs.start, y_min - ys.start:y_max - ys.start]
+                old = level.belief[:, x_min - old_xs.start:x_max - old_xs.start,
+                                   y_min - old_ys.start:y_max - old_ys.start]
+                if old.sum() > 0:
+                    new[...] = old * (new.sum() / old.sum())
+
+        return belief
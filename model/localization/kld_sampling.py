@@ -0,0 +1,37 @@
+import numpy as np
+from scipy.stats import norm
+
+
+def kld_bound(num_bins: np.ndarray, epsilon: float, delta: float) -> np.ndarray:
+    """Number of samples such that, with probability 1 - delta, the KL divergence between the sampled
+    distribution and the true one is below epsilon, when the samples fall in num_bins distinct bins
+    (Wilson-Hilferty approximation of the chi-square quantile, see Fox, "KLD-Sampling", 2001).
+    """
+    k = np.maximum(np.asarray(num_bins, dtype=float) - 1, 1)
+    z = norm.ppf(1 - delta)
+    a = 2 / (9 * k)
+
+    return k / (2 * epsilon) * (1 - a + np.sqrt(a) * z) ** 3
+
+
+def kld_sample_size(bins: np.ndarray, epsilon: float, delta: float, min_samples: int = 1) -> int:
+    """Returns the number of samples drawn by KLD-sampling, given the bins of a sequence of candidate
+    samples: the candidates are taken in order until their count reaches the bound of the number of
+    distinct bins they occupy. All the candidates are taken when the bound is never reached.
+
+    Args:
+        bins (np.ndarray): (N,) integer codes of the bins of the candidates, in drawing order.
+        epsilon (float): the bound of the KL divergence.
+        delta (float): the probability that the KL divergence exceeds the bound.
+        min_samples (int, optional): the minimum number of samples. Defaults to 1.
+    """
+    # number of distinct bins among the first n candidates, for every n
+    _, first = np.unique(bins, return_index=True)
+    new_bin = np.zeros(len(bins), dtype=bool)
+    new_bin[first] = True
+    num_bins = np.cumsum(new_bin)
+
+    n = np.arange(1, len(bins) + 1)
+    enough = (n >= kld_bound(num_bins, epsilon, delta)) & (n >= min_samples)
+
+    return int(np.argmax(enough)) + 1 if enough.any() else len(bins)
@@ -1,84 +1,326 @@
+from typing import List, Optional, Tuple
+
 import numpy as np
-from scipy.signal import convolve2d
 
 from base.localization import LocalizationBase
 from base.movement_models import InvalidActionException, MovementModelBase
 from base.robot import RobotBase
 from base.sensor import SensorBase
-from definitions import ROBOT_SIZE
+from definitions import MEASUREMENT_CACHE_DIR, ROBOT_SIZE, TRACKING_THRESHOLD, TRACKING_MARGIN, TRACKING_MAX_FRACTION
 from model.grid_world import GridWorld
+from model.localization.measurement_cache import load_or_compute, measurement_cache_key
+
+
+def precompute_measurements(world: GridWorld, sensor: SensorBase) -> np.ndarray:
+    """Returns the true measurements of every walkable pose of the world, as an (8, width, height) array,
+    with a trailing beam axis for multi-beam sensors. Non walkable poses hold 0.
+    """
+    orientations = 8
+
+    # cast the rays of every walkable pose in a single batch
+    i, j = np.nonzero(world.walkable)
+    i, j = np.repeat(i, orientations), np.repeat(j, orientations)
+    d = np.tile(np.arange(orientations), len(i) // orientations)
+    readings = sensor.true_readings(np.stack([i, j], axis=1) + ROBOT_SIZE, d)
+
+    means = np.zeros((orientations, world.width, world.height) + readings.shape[1:])
+    means[d, i, j] = readings
+
+    return means
+
+
+def load_measurements(world: GridWorld, sensor: SensorBase, cache_dir: Optional[str]) -> np.ndarray:
+    """Returns the precomputed measurements, from the cache when they were already
+    computed for this environment, sensor and scale. None disables the cache.
+    """
+    return load_or_compute(cache_dir, measurement_cache_key(world, sensor), world.walkable,
+                           lambda: precompute_measurements(world, sensor))
+
+
+def motion_update(taps: List[List[Tuple[int, int, float]]], belief: np.ndarray, moved: np.ndarray,
+                  heading_offset: int = 0, plane_buffer: Optional[np.ndarray] = None) -> None:
+    """Writes the convolution of an (8, width, height) belief with a motion filter to moved, as shifted
+    and weighted additions of the planes of each orientation (see MovementModelBase.get_taps()).
+    Poses shifted out of the belief are lost, as in a 'same' convolution.
+
+    Args:
+        taps (List[List[Tuple[int, int, float]]]): the taps of the filter of each orientation.
+        belief (np.ndarray): the belief, whose slot (o + heading_offset) % 8 holds orientation o.
+        moved (np.ndarray): the output, of the same shape as the belief.
+        heading_offset (int, optional): the offset of the orientations in the slots. Defaults to 0.
+        plane_buffer (np.ndarray, optional): a buffer at least as large as a plane, to avoid allocations.
+    """
+    moved.fill(0)
+    _, width, height = belief.shape
+    for orientation, orientation_taps in enumerate(taps):
+        slot = (orientation + heading_offset) % 8
+        for dx, dy, weight in orientation_taps:
+            source = belief[slot, max(-dx, 0):width - max(dx, 0), max(-dy, 0):height - max(dy, 0)]
+            target = moved[slot, max(dx, 0):width + min(dx, 0), max(dy, 0):height + min(dy, 0)]
+            if plane_buffer is None:
+                target += weight * source
+            else:
+                weighted = plane_buffer[:source.shape[0], :source.shape[1]]
+                np.multiply(source, weight, out=weighted)
+                target += weighted
+
+
+def orientation_slices(heading_offset: int) -> List[Tuple[slice, slice]]:
+    """Pairs of slices of the belief slots and of the matching orientations, covering the 8 orientations,
+    when the slot (o + heading_offset) % 8 holds the orientation o.
+    """
+    k = heading_offset
+    return [(slice(k, 8), slice(0, 8 - k)), (slice(0, k), slice(8 - k, 8))]
 
 
 class MarkovLocalization(LocalizationBase):
     """ Represents the logic for Markov Localization assuming perfect measurements.
         The probability of a measurement i given a pose l is defined as follows:
             p(i|l) = 1 if i is eps-close to the true measurement and 0 otherwise.
+
+        The belief is stored orientation-major, as an (8, width, height) array whose slot
+        (o + heading_offset) % 8 holds orientation o, such that turning only changes the offset.
+
+        In log space mode, the belief is kept as log-probabilities, updated in place:
+        obstacles hold -inf and the belief is normalized with a log-sum-exp.
+
+        In tracking mode, once the belief collapsed to a small region, see() and act() only
+        update a window around the poses holding a non-negligible probability. The belief
+        outside of the window is zero. The whole grid is updated again when the window grows
+        too large or when the robot is kidnapped.
+    """
+
+    # log of the smallest positive normal float: in log space, poses whose probability underflows
+    # during a motion update are kept at this value (relative to the most likely pose)
+    LOG_FLOOR = np.log(np.finfo(float).tiny)
+
+    """
+    Region of the whole grid, as slices along the orientation, x and y axes.
     """
+    FULL_REGION = (slice(None), slice(None), slice(None))
 
-    def __init__(self, world: GridWorld, sensor: SensorBase, movement_model: MovementModelBase) -> None:
+    def __init__(self, world: GridWorld, sensor: SensorBase, movement_model: MovementModelBase,
+                 cache_dir: Optional[str] = MEASUREMENT_CACHE_DIR, log_space: bool = False,
+                 tracking: bool = False) -> None:
+        """Initializes the localization with a uniform belief over the walkable poses.
+
+        Args:
+            world (GridWorld): the world where the robot resides.
+            sensor (SensorBase): the sensor of the robot.
+            movement_model (MovementModelBase): the movement model of the robot.
+            cache_dir (str, optional): directory where the precomputed measurements are cached
+            across runs. None disables the cache. Defaults to MEASUREMENT_CACHE_DIR.
+            log_space (bool, optional): whether the belief is kept as log-probabilities. Defaults to False.
+            tracking (bool, optional): whether only a window around the likely poses is updated
+            once the belief collapsed. Defaults to False.
+        """
         self.world = world
         self.sensor = sensor
         self.movement_model = movement_model
+        self.log_space = log_space
+        self.tracking = tracking
+
+        # (8, width, height) true measurements, with a trailing beam axis for multi-beam sensors
+        self.true_measurements = self._load_measurements(cache_dir)
+        self.blocked = ~self.world.walkable
+
+        # region of the grid updated by see() and act()
+        self.region: Tuple[slice, slice, slice] = self.FULL_REGION
+        self.heading_offset = 0
 
-        self.true_measurements = self._precompute_measurements(world.width, world.height)
+        # preallocated buffers of the in-place updates
+        shape = self.true_measurements.shape[:3]
+        self._motion_buffer = np.empty(shape)
+        self._plane_buffer = np.empty(shape[1:])
+        if log_space:
+            self._log_likelihood = np.empty(shape)
+            self._measurement_buffer = np.empty(self.true_measurements.shape)
+            self._buffer = np.empty(shape)
 
-        self.belief = np.ones_like(self.true_measurements)
+        self.belief = np.ones(shape[1:] + shape[:1])
 
         self.mask_out_belief_on_obstacles()
         self.normalize_belief()
 
+    @property
+    def belief(self) -> np.ndarray:
+        """The probabilities of the poses, an array of shape (width, height, 8).
+        """
+        state = self._state()[(np.arange(8) + self.heading_offset) % 8]
+        if self.log_space:
+            np.exp(state, out=state)
+        return np.moveaxis(state, 0, -1)
+
+    @belief.setter
+    def belief(self, belief: np.ndarray) -> None:
+        self.heading_offset = 0
+        belief = np.ascontiguousarray(np.moveaxis(belief, -1, 0), dtype=float)
+        if self.log_space:
+            with np.errstate(divide='ignore'):
+                self.log_belief = np.log(belief)
+        else:
+            self._belief = belief
+
+    def estimate(self) -> Tuple[float, float, int]:
+        slot, x, y = np.unravel_index(np.argmax(self._state()), self._state().shape)
+        return x + ROBOT_SIZE, y + ROBOT_SIZE, int((slot - self.heading_offset) % 8)
+
+    def _state(self) -> np.ndarray:
+        # the array holding the belief, probabilities or log-probabilities
+        return self.log_belief if self.log_space else self._belief
+
+    def _orientation_slices(self) -> List[Tuple[slice, slice]]:
+        return orientation_slices(self.heading_offset)
+
     def mask_out_belief_on_obstacles(self):
         """Annihilates likelihood that ended up in non walkbable regions due to
         convolutions. This function does not normalize the belief to sum up to 1.
         """
-        self.belief[~self.world.walkable] = 0
+        self._state()[self.region][:, self.blocked[self.region[1:]]] = -np.inf if self.log_space else 0
 
     def normalize_belief(self):
         """Normalizes the belief to sum up to 1.
         """
-        self.belief /= self.belief.sum()
+        if not self.log_space:
+            belief = self._belief[self.region]
+            belief /= belief.sum()
+            return
+
+        log_belief = self.log_belief[self.region]
+        max_log = log_belief.max()
+        if max_log == -np.inf:
+            # every pose was ruled out by the measurements, start over from a uniform belief
+            self.region = self.FULL_REGION
+            log_belief = self.log_belief
+            log_belief.fill(0)
+            self.mask_out_belief_on_obstacles()
+            max_log = 0.
+
+        # log-sum-exp, shifted by the maximum to avoid overflows
+        buffer = self._buffer[self.region]
+        np.subtract(log_belief, max_log, out=buffer)
+        np.exp(buffer, out=buffer)
+        log_belief -= max_log + np.log(buffer.sum())
+
+    def notify_kidnapped(self) -> None:
+        if self.region != self.FULL_REGION:
+            self._leave_window()
+
+    def _update_window(self) -> None:
+        """Fits the window around the poses whose probability is above TRACKING_THRESHOLD,
+        with a margin of TRACKING_MARGIN tiles, or leaves the window if it would cover more
+        than TRACKING_MAX_FRACTION of the grid.
+        """
+        _, xs, ys = self.region
+        if self.log_space:
+            likely = self.log_belief[self.region].max(axis=0) > np.log(TRACKING_THRESHOLD)
+        else:
+            likely = self._belief[self.region].max(axis=0) > TRACKING_THRESHOLD
+
+        i, = np.nonzero(likely.any(axis=1))
+        j, = np.nonzero(likely.any(axis=0))
+        if len(i) == 0:
+            return
+
+        width, height = self.blocked.shape
+        x0, y0 = xs.start or 0, ys.start or 0
+        x_min, x_max = max(x0 + i[0] - TRACKING_MARGIN, 0), min(x0 + i[-1] + 1 + TRACKING_MARGIN, width)
+        y_min, y_max = max(y0 + j[0] - TRACKING_MARGIN, 0), min(y0 + j[-1] + 1 + TRACKING_MARGIN, height)
 
-    def _precompute_measurements(self, width: int, height: int):
-        orientations = 8
-        means = np.zeros((width, height, orientations))
+        if (x_max - x_min) * (y_max - y_min) > TRACKING_MAX_FRACTION * width * height:
+            if self.region != self.FULL_REGION:
+                self._leave_window()
+            return
+
+        # clear the poses left out of the new window
+        window = (slice(None), slice(x_min, x_max), slice(y_min, y_max))
+        state = self._state()
+        kept = state[window].copy()
+        state[self.region] = -np.inf if self.log_space else 0
+        state[window] = kept
+        self.region = window
 
-        for i in range(width):
-            for j in range(height):
-                for d in range(orientations):
-                    if not self.world.walkable[i, j]:
-                        continue
+    def _leave_window(self) -> None:
+        self.region = self.FULL_REGION
+        if self.log_space:
+            # the poses outside of the window were ruled out, keep them reachable as after a motion update
+            np.maximum(self.log_belief, self.log_belief.max() + self.LOG_FLOOR, out=self.log_belief)
+            self.mask_out_belief_on_obstacles()
+            self.normalize_belief()
 
-                    means[i, j, d] = self.sensor.true_reading(np.array([i, j]) + ROBOT_SIZE, RobotBase.Direction(d))
+    def _load_measurements(self, cache_dir: Optional[str]) -> np.ndarray:
+        return load_measurements(self.world, self.sensor, cache_dir)
 
-        return means
+    def _precompute_measurements(self) -> np.ndarray:
+        return precompute_measurements(self.world, self.sensor)
 
-    def measurement_probability(self, measurement: float) -> np.ndarray:
+    def measurement_probability(self, measurement) -> np.ndarray:
         """
         Given a measurement, returns the probability
-        of being at a position and measuring the given measurement.
+        of being at a position and measuring the given measurement,
+        as an (8, width, height) array ordered by orientation.
         """
-        # return np.isclose(self.true_measurements, measurement).astype('int')
-        likelihood = np.vectorize(self.sensor.likelihood)
-        return likelihood(self.true_measurements, measurement)
+        # the likelihoods of the sensors are vectorized, and reduce the beam axis of multi-beam sensors
+        return self.sensor.likelihood(self.true_measurements[self.region], measurement)
 
-    def see(self, measurement: float) -> None:
-        self.belief = self.measurement_probability(measurement) * self.belief
+    def log_measurement_probability(self, measurement) -> np.ndarray:
+        """Log of measurement_probability(), up to an additive constant. Only available in log space mode:
+        the returned array is a buffer, overwritten by the next call.
+        """
+        with np.errstate(divide='ignore'):
+            return np.log(self.measurement_probability(measurement), out=self._log_likelihood[self.region])
+
+    def see(self, measurement) -> None:
+        if self.log_space:
+            log_belief = self.log_belief[self.region]
+            log_likelihood = self.log_measurement_probability(measurement)
+            for slots, orientations in self._orientation_slices():
+                log_belief[slots] += log_likelihood[orientations]
+            self.normalize_belief()
+        else:
+            belief = self._belief[self.region]
+            likelihood = self.measurement_probability(measurement)
+            for slots, orientations in self._orientation_slices():
+                belief[slots] *= likelihood[orientations]
+
+            belief /= belief.sum()
+            # make sure no probs go to zero bc of machine imprecision
+            belief += 2e-16
+            self.mask_out_belief_on_obstacles()
 
-        self.belief = self.belief / self.belief.sum()
-        # make sure no probs go to zero bc of machine imprecision
-        self.belief += np.ones_like(self.belief) * 2e-16
-        self.belief[~self.world.walkable] = 0
+        if self.tracking:
+            self._update_window()
 
     def act(self, action: RobotBase.Action) -> None:
         try:
-            filter = self.movement_model.get_filter(action)
-            for i in range(filter.shape[-1]):
-                self.belief[:, :, i] = convolve2d(self.belief[:, :, i], filter[:, :, i], mode='same')
-
-            self.mask_out_belief_on_obstacles()
-            self.normalize_belief()
-            return
+            taps = self.movement_model.get_taps(action)
         except InvalidActionException:
-            pass
-        direction = 1 if action == action.TURN_RIGHT else -1
-        self.belief = np.roll(self.belief, shift=direction, axis=2)
+            # rotate the slots of the orientations instead of the belief
+            direction = 1 if action == action.TURN_RIGHT else -1
+            self.heading_offset = (self.heading_offset - direction) % 8
+            return
+
+        moved = self._motion_buffer[self.region]
+        if self.log_space:
+            # the motion update is a sum of probabilities: move the probabilities relative to
+            # the most likely pose, then go back to log space
+            log_belief = self.log_belief[self.region]
+            max_log = log_belief.max()
+            belief = self._buffer[self.region]
+            np.subtract(log_belief, max_log, out=belief)
+            np.exp(belief, out=belief)
+            motion_update(taps, belief, moved, self.heading_offset, self._plane_buffer)
+
+            with np.errstate(divide='ignore'):
+                np.log(moved, out=log_belief)
+            np.maximum(log_belief, self.LOG_FLOOR, out=log_belief)
+            log_belief += max_log
+        else:
+            motion_update(taps, self._belief[self.region], moved, self.heading_offset, self._plane_buffer)
+            if self.region == self.FULL_REGION:
+                self._belief, self._motion_buffer = self._motion_buffer, self._belief
+            else:
+                self._belief[self.region] = moved
+
+        self.mask_out_belief_on_obstacles()
+        self.normalize_belief()
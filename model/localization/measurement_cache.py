@@ -0,0 +1,117 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import Callable, Dict, Iterable, Optional
+
+import numpy as np
+
+from base.sensor import SensorBase
+from definitions import ROBOT_SIZE, SCALE, TILE_SIZE, defs
+
+# bump whenever the content or the layout of the cached arrays changes
+CACHE_VERSION = 2
+
+
+def measurement_cache_key(world, sensor: SensorBase) -> str:
+    """Hashes everything the precomputed measurements depend on: the environment definition
+    (including the geometry of its obstacles), the tile size, the sensor length and beams, and the scale.
+    """
+    h = hashlib.sha256()
+    h.update(repr((CACHE_VERSION, defs.width, defs.height, defs.tile_size, defs.sensor_len,
+                   TILE_SIZE, SCALE, ROBOT_SIZE, float(sensor.sensor_length),
+                   getattr(sensor, 'num_beams', 1), float(getattr(sensor, 'spread', 0)))).encode())
+    for obj in world.objects:
+        h.update(obj.shapely_shape.wkb)
+
+    return h.hexdigest()
+
+
+class MeasurementCache:
+    """On-disk cache of precomputed arrays. Each entry is a directory named after its key,
+    holding one .npy file per array, such that entries can be memory mapped when loaded.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def load(self, key: str, names: Iterable[str] = ()) -> Optional[Dict[str, np.ndarray]]:
+        """Returns the memory mapped arrays of the entry, or None if the entry does not exist,
+        misses one of the given arrays or can not be read.
+        """
+        entry = os.path.join(self.directory, key)
+        if not os.path.isdir(entry):
+            return None
+
+        try:
+            arrays = {
+                os.path.splitext(name)[0]: np.load(os.path.join(entry, name), mmap_mode='r')
+                for name in os.listdir(entry) if name.endswith('.npy')
+            }
+        except (OSError, ValueError):
+            return None
+
+        if not all(name in arrays for name in names):
+            return None
+        return arrays
+
+    def store(self, key: str, validate: Optional[Callable[[Dict[str, np.ndarray]], bool]] = None,
+              **arrays: np.ndarray) -> None:
+        """Stores the arrays under the given key. The entry is written to a temporary directory
+        first and then moved in place, so that concurrent readers never see a partial entry.
+        An existing entry is kept if it holds the same arrays and passes validate (e.g. it was just
+        stored by another process), and replaced otherwise.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=self.directory)
+        target = os.path.join(self.directory, key)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp, name + '.npy'), array)
+            # mkdtemp only lets the owner in, the cache directory may be shared with other users
+            os.chmod(tmp, 0o755)
+
+            # a few attempts, the cache is only an optimization if the entry can not be replaced
+            for _ in range(3):
+                try:
+                    os.rename(tmp, target)
+                    return
+                except OSError:
+                    existing = self.load(key, arrays)
+                    if existing is not None and (validate is None or validate(existing)):
+                        # another process stored a valid entry in the meantime
+                        return
+                    del existing
+
+                # move the stale entry aside before removing it, readers never see it half removed
+                stale = tempfile.mkdtemp(dir=self.directory)
+                try:
+                    os.rename(target, os.path.join(stale, key))
+                except OSError:
+                    # the entry was already removed or replaced by another process
+                    pass
+                shutil.rmtree(stale, ignore_errors=True)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def load_or_compute(cache_dir: Optional[str], key: str, walkable: np.ndarray,
+                    compute: Callable[[], np.ndarray]) -> np.ndarray:
+    """Returns the array cached under the key, or computes and caches it when it is missing or was
+    computed for other walkable tiles. None disables the cache.
+    """
+    if cache_dir is None:
+        return compute()
+
+    def valid(entry: Dict[str, np.ndarray]) -> bool:
+        return np.array_equal(entry['walkable'], walkable)
+
+    cache = MeasurementCache(cache_dir)
+    entry = cache.load(key, ('true_measurements', 'walkable'))
+    if entry is not None and valid(entry):
+        return entry['true_measurements']
+
+    true_measurements = compute()
+    cache.store(key, valid, true_measurements=true_measurements, walkable=walkable)
+
+    return true_measurements
@@ -1,110 +1,145 @@
+from typing import Optional, Tuple
+
 import numpy as np
 
 from base.localization import LocalizationBase
+from base.profiling import profiler
 from base.robot import RobotBase
 from base.sensor import SensorBase
 from definitions import *
 from model.continuous_world import ContinuousWorld
-
-
-class Particle:
-    def __init__(self, x, y, orientation, weight=1.0):
-        self.x = x
-        self.y = y
-        self.orientation = orientation
-        self.weight = weight
-
-    def move(self, action: RobotBase.Action, world: ContinuousWorld):
-        if action == action.TURN_LEFT:
-            self.orientation = RobotBase.Direction((self.orientation.value - 1) % len(RobotBase.Direction))
-        elif action == action.TURN_RIGHT:
-            self.orientation = RobotBase.Direction((self.orientation.value + 1) % len(RobotBase.Direction))
-        else:
-
-            uncertainty_multiplier = 1.
-
-            move_dir = self.orientation.value \
-                if action == action.FORWARD \
-                else (self.orientation.value + 4) % len(RobotBase.Direction)
-
-            speed_mult = SPEED / FPS
-            new_pos = np.array([self.x, self.y]) + uncertainty_multiplier * speed_mult * \
-                      RobotBase.directions[move_dir] * TILE_SIZE / np.linalg.norm(RobotBase.directions[move_dir])
-
-            new_center = (new_pos + ROBOT_SIZE)
-            if not world.check_within_boundaries(*new_center) or world.is_occupied(*new_center):
-                return
-            self.x, self.y = new_pos
+from model.localization.kld_sampling import kld_sample_size
+from model.localization.particle_set import Particle, ParticleSet
+from model.localization.resampling import RESAMPLERS, multinomial_resample
+from model.sensors.ExpectedRangeTable import ExpectedRangeTable
 
 
 class MonteCarloLocalization(LocalizationBase):
 
-    def __init__(self, world: ContinuousWorld, sensor: SensorBase, num_particles=10) -> None:
+    def __init__(self, world: ContinuousWorld, sensor: SensorBase, num_particles=10,
+                 range_table: Optional[ExpectedRangeTable] = None, kld_sampling: bool = False,
+                 resampler: str = 'multinomial') -> None:
+        """Initializes a particle filter with particles spread uniformly over the free space.
+
+        Args:
+            world (ContinuousWorld): the world where the robot resides.
+            sensor (SensorBase): the sensor of the robot.
+            num_particles (int, optional): the number of particles. Defaults to 10.
+            range_table (ExpectedRangeTable, optional): precomputed true readings of the sensor.
+            When given, particles are weighted with a table lookup instead of ray casting.
+            kld_sampling (bool, optional): whether the number of particles is adapted to the spread of the
+            belief with KLD-sampling, between KLD_MIN_PARTICLES and KLD_MAX_PARTICLES. The filter then starts
+            with KLD_MAX_PARTICLES particles and num_particles is ignored. Defaults to False.
+            resampler (str, optional): the resampling scheme, one of 'multinomial', 'systematic', 'stratified'
+            and 'residual'. Defaults to 'multinomial'.
+        """
+        if resampler not in RESAMPLERS:
+            raise ValueError(f"Unknown resampler {resampler}, expected one of {list(RESAMPLERS)}")
+
         self.world = world
         self.sensor = sensor
-        self.particles = self.initialize_particles(num_particles)
-
-    def initialize_particles(self, num_particles: int):
-        return [self.get_particle() for _ in range(num_particles)]
+        self.num_particles = KLD_MAX_PARTICLES if kld_sampling else num_particles
+        self.range_table = range_table
+        self.kld_sampling = kld_sampling
+        self.resample_indices = RESAMPLERS[resampler]
+        self.particles = self.initialize_particles(self.num_particles)
+
+    def initialize_particles(self, num_particles: int) -> ParticleSet:
+        return self.sample_particles(num_particles)
+
+    def sample_particles(self, num_particles: int, weight: float = 1.0) -> ParticleSet:
+        """Samples particles uniformly over the free space of the world, with a random orientation.
+        """
+        x, y = np.empty(0), np.empty(0)
+        while len(x) < num_particles:
+            new_x = np.random.uniform(0, self.world.width, size=num_particles)
+            new_y = np.random.uniform(0, self.world.height, size=num_particles)
+            free = ~self.world.is_occupied_batch(new_x, new_y)
+            x, y = np.concatenate([x, new_x[free]]), np.concatenate([y, new_y[free]])
+
+        heading = np.random.choice(range(0, 8), size=num_particles)
+        return ParticleSet(x[:num_particles], y[:num_particles], heading, np.full(num_particles, weight))
 
     def get_particle(self) -> Particle:
-        while True:
-            x = np.random.uniform(0, self.world.width)
-            y = np.random.uniform(0, self.world.height)
-            if not self.world.is_occupied(x, y):
-                orientation = RobotBase.Direction(np.random.choice(range(0, 8)))
-                return Particle(x, y, orientation)
+        return self.sample_particles(1)[0]
 
     def _resample(self):
         # create new particles with the states of sampled particles, but reset weights
-        sampled_particles = np.random.choice(self.particles, size=NUM_PARTICLES, replace=True,
-                                             p=[particle.weight for particle in self.particles])
-        self.particles = []
-        for particle in sampled_particles:
-            sd = np.sqrt(1 / particle.weight)
-            noise_x = np.random.normal(0, sd * PARTICLE_NOISE)
-            noise_y = np.random.normal(0, sd * PARTICLE_NOISE)
-            new_x = particle.x + noise_x
-            new_y = particle.y + noise_y
-
-            if not self.world.check_within_boundaries(new_x, new_y) or self.world.is_occupied(new_x, new_y):
-                new_x, new_y = particle.x, particle.y
-
-            stay_prob = np.sqrt(1 - particle.weight)
-            shift_prob = (1 - stay_prob) / 2
-            orientation_noise = np.random.choice([-1, 0, 1], p=[shift_prob, stay_prob, shift_prob])
-            new_orientation = RobotBase.Direction(
-                (particle.orientation.value + orientation_noise) % len(RobotBase.Direction))
-
-            self.particles.append(Particle(new_x, new_y, new_orientation, weight=1.0 / NUM_PARTICLES))
+        particles = self.particles
+        num_particles = self.num_particles
+        if self.kld_sampling:
+            # KLD-sampling needs the candidates in random drawing order, whatever the resampler
+            candidates = multinomial_resample(particles.weight, num_particles)
+            num_particles = self._kld_sample_size(candidates)
+        if self.kld_sampling and self.resample_indices is multinomial_resample:
+            # keep the very candidates whose bins sized the set
+            sampled = candidates[:num_particles]
+        else:
+            # the other resamplers draw the set anew from the same weights, so that the KLD bound on its
+            # size only holds in distribution
+            sampled = self.resample_indices(particles.weight, num_particles)
+
+        # displace the particles, the less likely they were the more, but never into an obstacle
+        weight = particles.weight[sampled]
+        sd = np.sqrt(1 / weight) * PARTICLE_NOISE
+        old_x, old_y = particles.x[sampled], particles.y[sampled]
+        new_x = old_x + np.random.normal(0, sd)
+        new_y = old_y + np.random.normal(0, sd)
+        valid = self.world.check_within_boundaries_batch(new_x, new_y) & ~self.world.is_occupied_batch(new_x, new_y)
+        x, y = np.where(valid, new_x, old_x), np.where(valid, new_y, old_y)
+
+        # turn the particles left or right with a probability of (1 - stay_prob) / 2 each
+        stay_prob = np.sqrt(1 - weight)
+        shift_prob = (1 - stay_prob) / 2
+        u = np.random.random(num_particles)
+        orientation_noise = (u >= shift_prob).astype(np.int64) + (u >= shift_prob + stay_prob) - 1
+        heading = (particles.heading[sampled] + orientation_noise) % len(RobotBase.Direction)
+
+        self.particles = ParticleSet(x, y, heading, np.full(num_particles, 1.0 / num_particles))
 
         # introduce jittering in the case of perception aliasing
-        num_jitter_particles = int(JITTER_RATE * NUM_PARTICLES)
-        for _ in range(num_jitter_particles):
-            particle = self.get_particle()
-            particle.weight = 1. / NUM_PARTICLES
-            self.particles.append(particle)
+        num_jitter_particles = int(JITTER_RATE * num_particles)
+        self.particles.extend(self.sample_particles(num_jitter_particles, weight=1. / num_particles))
+
+    def _kld_sample_size(self, candidates: np.ndarray) -> int:
+        """Number of the candidate particles (indices in drawing order) kept by KLD-sampling. The bins are
+        KLD_BIN_SIZE tiles wide along x and y, and there is one bin per heading.
+        """
+        bin_size = KLD_BIN_SIZE * TILE_SIZE
+        num_y_bins = int(self.world.height // bin_size) + 1
+        bx = (self.particles.x[candidates] // bin_size).astype(np.int64)
+        by = (self.particles.y[candidates] // bin_size).astype(np.int64)
+        bins = (bx * num_y_bins + by) * len(RobotBase.Direction) + self.particles.heading[candidates]
+
+        return kld_sample_size(bins, KLD_EPSILON, KLD_DELTA, KLD_MIN_PARTICLES)
+
+    def estimate(self) -> Tuple[float, float, int]:
+        # weighted mean of the positions, most likely heading
+        particles = self.particles
+        x = np.average(particles.x, weights=particles.weight) / TILE_SIZE
+        y = np.average(particles.y, weights=particles.weight) / TILE_SIZE
+        heading = np.bincount(particles.heading, weights=particles.weight, minlength=len(RobotBase.Direction))
+        return x, y, int(np.argmax(heading))
 
     def act(self, action: RobotBase.Action) -> None:
-        for particle in self.particles:
-            particle.move(action, self.world)
+        self.particles.move(action, self.world)
 
     def see(self, measurement: float) -> None:
-        for particle in self.particles:
-            # compute the expected measurement for this particle
-            true_measurement = self.sensor.true_reading(np.array([particle.x // TILE_SIZE, particle.y // TILE_SIZE]),
-                                                        particle.orientation)
-
-            # update the particle's weight based on the likelihood of the observation
-            particle.weight *= self.sensor.likelihood(true_measurement, measurement)
+        # compute the expected measurements of all the particles in one batch
+        xy = np.stack([self.particles.x / TILE_SIZE, self.particles.y / TILE_SIZE], axis=1)
+        if self.range_table is not None:
+            true_measurements = self.range_table.lookup(xy, self.particles.heading)
+        else:
+            true_measurements = self.sensor.true_readings(xy, self.particles.heading)
 
-        total_weight = np.sum([particle.weight for particle in self.particles])
-        for particle in self.particles:
-            particle.weight /= total_weight
+        # update the particles' weights based on the likelihood of the observation
+        self.particles.weight *= self.sensor.likelihood(true_measurements, measurement)
+        self.particles.normalize_weights()
 
         # calculate the effective sample size
-        ess = 1.0 / np.sum(np.square([particle.weight for particle in self.particles]))
+        ess = self.particles.effective_sample_size()
 
         # resample the particles based on their weights only if ESS is below the threshold
         if ess < len(self.particles) / 2:
-            self._resample()
+            with profiler.phase('resample'):
+                self._resample()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from typing import Iterator
+
+import numpy as np
+
+from base.robot import RobotBase
+from definitions import ROBOT_SIZE, SIM_RATE, SPEED, TILE_SIZE
+from model.continuous_world import ContinuousWorld
+
+
+class Particle:
+    """A single particle, as seen from outside the particle set (e.g. by the views).
+    """
+
+    def __init__(self, x, y, orientation, weight=1.0):
+        self.x = x
+        self.y = y
+        self.orientation = orientation
+        self.weight = weight
+
+
+class ParticleSet:
+    """Set of particles stored as a struct of contiguous arrays: the x, y pixel coordinates,
+    the heading index (see RobotBase.Direction) and the weight of each particle.
+    Motion, normalization and effective sample size are computed for all particles at once.
+    """
+
+    """
+    Unit vectors of the 8 directions, indexed by heading.
+    """
+    unit_directions = np.array([d / np.linalg.norm(d) for d in RobotBase.directions])
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, heading: np.ndarray, weight: np.ndarray) -> None:
+        self.x = np.ascontiguousarray(x, dtype=float)
+        self.y = np.ascontiguousarray(y, dtype=float)
+        self.heading = np.ascontiguousarray(heading, dtype=np.int64)
+        self.weight = np.ascontiguousarray(weight, dtype=float)
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def __getitem__(self, i: int) -> Particle:
+        return Particle(self.x[i], self.y[i], RobotBase.Direction(self.heading[i]), self.weight[i])
+
+    def __iter__(self) -> Iterator[Particle]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def select(self, indices: np.ndarray) -> ParticleSet:
+        """Returns a new particle set made of copies of the particles at the given indices.
+        """
+        return ParticleSet(self.x[indices], self.y[indices], self.heading[indices], self.weight[indices])
+
+    def extend(self, other: ParticleSet) -> None:
+        """Appends the particles of another set to this one.
+        """
+        self.x = np.concatenate([self.x, other.x])
+        self.y = np.concatenate([self.y, other.y])
+        self.heading = np.concatenate([self.heading, other.heading])
+        self.weight = np.concatenate([self.weight, other.weight])
+
+    def move(self, action: RobotBase.Action, world: ContinuousWorld) -> None:
+        """Applies the action to every particle. Particles that would end up outside the world
+        or on an obstacle do not move.
+        """
+        num_directions = len(RobotBase.Direction)
+        if action == action.TURN_LEFT:
+            self.heading = (self.heading - 1) % num_directions
+            return
+        if action == action.TURN_RIGHT:
+            self.heading = (self.heading + 1) % num_directions
+            return
+
+        move_dir = self.heading if action == action.FORWARD else (self.heading + 4) % num_directions
+
+        speed_mult = SPEED / SIM_RATE
+        step = speed_mult * self.unit_directions[move_dir] * TILE_SIZE
+        new_x, new_y = self.x + step[:, 0], self.y + step[:, 1]
+
+        new_center_x, new_center_y = new_x + ROBOT_SIZE, new_y + ROBOT_SIZE
+        valid = world.check_within_boundaries_batch(new_center_x, new_center_y) & \
+            ~world.is_occupied_batch(new_center_x, new_center_y)
+
+        self.x = np.where(valid, new_x, self.x)
+        self.y = np.where(valid, new_y, self.y)
+
+    def normalize_weights(self) -> None:
+        self.weight /= self.weight.sum()
+
+    def effective_sample_size(self) -> float:
+        return 1.0 / np.sum(np.square(self.weight))
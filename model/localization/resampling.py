@@ -0,0 +1,58 @@
+"""
+Resampling schemes of the particle filter. Each resampler takes the normalized weights of the
+particles and the number of particles to draw, and returns the indices of the drawn particles.
+"""
+
+from typing import Callable, Dict
+
+import numpy as np
+
+
+def _search(weights: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    cumulative = np.cumsum(weights)
+    # rounding errors must not leave positions beyond the last particle, nor select the zero weight
+    # particles that follow it: they go to the last particle of positive weight
+    cumulative[np.flatnonzero(weights)[-1]:] = 1.
+    return np.searchsorted(cumulative, positions, side='right')
+
+
+def multinomial_resample(weights: np.ndarray, num_particles: int) -> np.ndarray:
+    """Draws each particle independently, with a probability equal to its weight.
+    """
+    return _search(weights, np.random.random(num_particles))
+
+
+def systematic_resample(weights: np.ndarray, num_particles: int) -> np.ndarray:
+    """Low variance resampling: draws the particles at evenly spaced positions of the cumulative weights,
+    shifted by a single random offset.
+    """
+    return _search(weights, (np.random.random() + np.arange(num_particles)) / num_particles)
+
+
+def stratified_resample(weights: np.ndarray, num_particles: int) -> np.ndarray:
+    """Draws one particle uniformly within each of num_particles equal strata of the cumulative weights.
+    """
+    return _search(weights, (np.random.random(num_particles) + np.arange(num_particles)) / num_particles)
+
+
+def residual_resample(weights: np.ndarray, num_particles: int) -> np.ndarray:
+    """Copies each particle floor(num_particles * weight) times, then draws the remaining particles
+    from the residual weights with systematic resampling.
+    """
+    copies = np.floor(num_particles * weights).astype(np.int64)
+    indices = np.repeat(np.arange(len(weights)), copies)
+
+    num_residual = num_particles - len(indices)
+    if num_residual > 0:
+        residual = num_particles * weights - copies
+        indices = np.concatenate([indices, systematic_resample(residual / residual.sum(), num_residual)])
+
+    return indices
+
+
+RESAMPLERS: Dict[str, Callable[[np.ndarray, int], np.ndarray]] = {
+    'multinomial': multinomial_resample,
+    'systematic': systematic_resample,
+    'stratified': stratified_resample,
+    'residual': residual_resample,
+}
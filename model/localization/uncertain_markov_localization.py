@@ -9,9 +9,30 @@ class UncertainMarkovLocalization(MarkovLocalization):
     """Represents the logic of an uncertain Markov Localization.
         The probability of a measurement i given a pose l is defined as follows:
         p(i|l) ~ Norm(true_i, sigma)
+        With a multi-beam sensor, the beams are independent and p(i|l) is the product over the beams.
     """
 
-    def measurement_probability(self, measurement: float) -> np.ndarray:
-        # create nd-array of gaussians, centered at the true measurement.
-        # Sample the measurement from the PDFs
-        return norm.pdf(measurement, self.true_measurements, MEASUREMENT_SIGMA)
+    def measurement_probability(self, measurement) -> np.ndarray:
+        if self.true_measurements.ndim == 3:
+            # create nd-array of gaussians, centered at the true measurement.
+            # Sample the measurement from the PDFs
+            return norm.pdf(measurement, self.true_measurements[self.region], MEASUREMENT_SIGMA)
+
+        # joint likelihood of the beams, up to a constant factor: the log-likelihoods are
+        # shifted by their maximum to keep the product of many small densities from underflowing
+        log_probability = norm.logpdf(measurement, self.true_measurements[self.region], MEASUREMENT_SIGMA)
+        log_probability = log_probability.sum(axis=-1)
+        return np.exp(log_probability - log_probability.max())
+
+    def log_measurement_probability(self, measurement) -> np.ndarray:
+        # log of the gaussian densities without their constant term, computed in the buffers
+        residual = self._measurement_buffer[self.region]
+        log_likelihood = self._log_likelihood[self.region]
+        np.subtract(self.true_measurements[self.region], measurement, out=residual)
+        np.square(residual, out=residual)
+        if residual.ndim > 3:
+            # independent beams
+            np.sum(residual, axis=-1, out=log_likelihood)
+            residual = log_likelihood
+
+        return np.multiply(residual, -0.5 / MEASUREMENT_SIGMA ** 2, out=log_likelihood)
@@ -0,0 +1,92 @@
+import numpy as np
+import shapely
+from shapely import STRtree
+
+
+class OccupancyGrid:
+    """Rasterized occupancy bitmap of a world, answering occupancy queries in O(1).
+
+    The world is divided in square cells, each classified once as free (no obstacle touches it),
+    occupied (it lies in the interior of an obstacle) or boundary (an obstacle boundary crosses it).
+    Only the queries falling on boundary cells, or outside the grid, are answered with an exact
+    geometric check.
+    """
+    FREE = 0
+    OCCUPIED = 1
+    BOUNDARY = 2
+
+    def __init__(self, index: STRtree, width: float, height: float, cell_size: float) -> None:
+        """Rasterizes the indexed shapes.
+
+        Args:
+            index (STRtree): spatial index over the shapely shapes of the obstacles.
+            width (float): the width of the world in pixels.
+            height (float): the height of the world in pixels.
+            cell_size (float): the side of a cell in pixels.
+        """
+        self.index = index
+        self.cell_size = cell_size
+        self.cells = np.full((int(np.ceil(width / cell_size)), int(np.ceil(height / cell_size))), self.FREE, np.uint8)
+
+        occupied = np.zeros(self.cells.shape, dtype=bool)
+        touched = np.zeros(self.cells.shape, dtype=bool)
+        for shape in index.geometries:
+            # only rasterize the cells within the bounds of the shape
+            min_x, min_y, max_x, max_y = shape.bounds
+            i0, j0 = max(int(min_x // cell_size), 0), max(int(min_y // cell_size), 0)
+            i1 = min(int(max_x // cell_size) + 1, self.cells.shape[0])
+            j1 = min(int(max_y // cell_size) + 1, self.cells.shape[1])
+            if i0 >= i1 or j0 >= j1:
+                continue
+
+            i, j = np.meshgrid(np.arange(i0, i1), np.arange(j0, j1), indexing='ij')
+            boxes = shapely.box(i * cell_size, j * cell_size, (i + 1) * cell_size, (j + 1) * cell_size)
+
+            touched[i0:i1, j0:j1] |= shapely.intersects(shape, boxes)
+            occupied[i0:i1, j0:j1] |= shapely.contains_properly(shape, boxes)
+
+        self.cells[touched] = self.BOUNDARY
+        self.cells[occupied] = self.OCCUPIED
+
+    def cell_state(self, x: float, y: float) -> int:
+        """Returns the state of the cell containing the point, BOUNDARY outside the grid.
+        """
+        i, j = int(x // self.cell_size), int(y // self.cell_size)
+        if 0 <= i < self.cells.shape[0] and 0 <= j < self.cells.shape[1]:
+            return self.cells[i, j]
+
+        return self.BOUNDARY
+
+    def is_occupied(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Batched occupancy query.
+
+        Args:
+            x (np.ndarray): array of x pixel coordinates.
+            y (np.ndarray): array of y pixel coordinates, of the same shape as x.
+
+        Returns:
+            np.ndarray: boolean array, True where the point lies in the interior of an obstacle.
+        """
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        i = np.floor(x / self.cell_size).astype(np.int64)
+        j = np.floor(y / self.cell_size).astype(np.int64)
+
+        inside = (i >= 0) & (i < self.cells.shape[0]) & (j >= 0) & (j < self.cells.shape[1])
+        state = np.full(x.shape, self.BOUNDARY, dtype=np.uint8)
+        state[inside] = self.cells[i[inside], j[inside]]
+
+        occupied = state == self.OCCUPIED
+        boundary = state == self.BOUNDARY
+        if boundary.any():
+            occupied[boundary] = self.contains(x[boundary], y[boundary])
+
+        return occupied
+
+    def contains(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Exact check of whether the points lie in the interior of any of the shapes.
+        """
+        occupied = np.zeros(np.shape(x), dtype=bool)
+        point, _ = self.index.query(shapely.points(x, y), predicate='within')
+        occupied[point] = True
+
+        return occupied
@@ -1,6 +1,7 @@
 import numpy as np
 
 from base.localization import LocalizationBase
+from base.profiling import profiler
 from base.robot import RobotBase
 from base.sensor import SensorBase
 from definitions import *
@@ -8,6 +9,7 @@ from definitions import *
 
 class ContinuousRobot(RobotBase):
     def __init__(self, world, x, y, sensor: SensorBase, localization: LocalizationBase) -> None:
+        super().__init__()
         self.sensor = sensor
         self.set_position(x, y)
 
@@ -18,6 +20,11 @@ class ContinuousRobot(RobotBase):
         self.sensor.sense(self.position + ROBOT_SIZE, self.orientation)
 
     def move(self, action: RobotBase.Action, dt: float):
+        with profiler.phase('step'):
+            self._move(action)
+        profiler.step_done()
+
+    def _move(self, action: RobotBase.Action):
         self.current_action = action
 
         if action == action.TURN_LEFT:
@@ -32,7 +39,7 @@ class ContinuousRobot(RobotBase):
                 if action == action.FORWARD \
                 else (self.orientation.value + 4) % len(self.Direction)
 
-            speed_mult = SPEED / FPS
+            speed_mult = SPEED / SIM_RATE
             new_pos = self.position + uncertainty_multiplier * speed_mult * ContinuousRobot.directions[
                 move_dir] * TILE_SIZE / np.linalg.norm(ContinuousRobot.directions[move_dir] * TILE_SIZE)
 
@@ -42,11 +49,16 @@ class ContinuousRobot(RobotBase):
                 return
             self.set_position(new_pos)
 
-        reading = self.sensor.sense(self.position + ROBOT_SIZE, self.orientation)[0]
+        with profiler.phase('ray_cast'):
+            reading = self.sensor.sense(self.position + ROBOT_SIZE, self.orientation)
 
-        self.localization.act(action)
-        self.localization.see(reading)
+        with profiler.phase('act'):
+            self.localization.act(action)
+        with profiler.phase('see'):
+            self.localization.see(reading)
 
-        self.sensor.sense(self.position + ROBOT_SIZE, self.orientation)
+        with profiler.phase('ray_cast'):
+            self.sensor.sense(self.position + ROBOT_SIZE, self.orientation)
 
-        self.on_move.notify()
+        with profiler.phase('view_notify'):
+            self.on_move.notify()
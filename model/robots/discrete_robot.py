@@ -1,6 +1,7 @@
 import numpy as np
 
 from base.localization import LocalizationBase
+from base.profiling import profiler
 from base.robot import RobotBase
 from base.sensor import SensorBase
 from definitions import ROBOT_SIZE, TILE_SIZE
@@ -19,6 +20,7 @@ class DiscreteRobot(RobotBase):
             sensor (SensorBase): the sensor type
             localization (LocalizationBase): the localization type
         """
+        super().__init__()
         self.sensor = sensor
         self.set_position(x, y)
 
@@ -30,6 +32,11 @@ class DiscreteRobot(RobotBase):
         self.sensor.sense(self.position + ROBOT_SIZE, self.orientation)
 
     def move(self, action: RobotBase.Action, dt: float):
+        with profiler.phase('step'):
+            self._move(action)
+        profiler.step_done()
+
+    def _move(self, action: RobotBase.Action):
         self.current_action = action
         if action == action.TURN_LEFT:
             self.orientation = self.Direction((self.orientation.value - 1) % len(self.Direction))
@@ -60,9 +67,13 @@ class DiscreteRobot(RobotBase):
                 return
             self.set_position(new_pos)
 
-        reading = self.sensor.sense(self.position + ROBOT_SIZE, self.orientation)
+        with profiler.phase('ray_cast'):
+            reading = self.sensor.sense(self.position + ROBOT_SIZE, self.orientation)
 
-        self.localization.act(action)
-        self.localization.see(reading)
+        with profiler.phase('act'):
+            self.localization.act(action)
+        with profiler.phase('see'):
+            self.localization.see(reading)
 
-        self.on_move.notify()
+        with profiler.phase('view_notify'):
+            self.on_move.notify()
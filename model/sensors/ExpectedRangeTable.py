@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+import os
+
+import numpy as np
+
+from base.sensor import SensorBase
+
+
+class ExpectedRangeTable:
+    """Lookup table of the true readings of a sensor over a discretized (x, y, heading) grid.
+
+    The table samples the world every 1 / resolution tiles along x and y, for each of the
+    8 headings. Readings at arbitrary positions are bilinearly interpolated between the
+    4 surrounding samples. A table can be shared by several localizations, or saved once
+    and loaded (memory mapped) by later runs.
+    """
+
+    def __init__(self, ranges: np.ndarray, resolution: int) -> None:
+        """
+        Args:
+            ranges (np.ndarray): (nx, ny, 8) array of the true readings at the sample points,
+            or (nx, ny, 8, B) for a sensor with B beams.
+            resolution (int): the number of samples per tile along each axis.
+        """
+        self.ranges = ranges
+        self.resolution = resolution
+
+    @classmethod
+    def build(cls, sensor: SensorBase, width: int, height: int, resolution: int = 1) -> ExpectedRangeTable:
+        """Builds the table with a single batched call to sensor.true_readings().
+
+        Args:
+            sensor (SensorBase): the sensor whose readings are tabulated.
+            width (int): the width of the world in tiles.
+            height (int): the height of the world in tiles.
+            resolution (int, optional): the number of samples per tile. Defaults to 1.
+        """
+        orientations = 8
+        nx, ny = width * resolution + 1, height * resolution + 1
+
+        i, j, d = np.meshgrid(np.arange(nx), np.arange(ny), np.arange(orientations), indexing='ij')
+        xy = np.stack([i.ravel(), j.ravel()], axis=1) / resolution
+        readings = sensor.true_readings(xy, d.ravel())
+        ranges = readings.reshape((nx, ny, orientations) + readings.shape[1:])
+
+        return cls(ranges, resolution)
+
+    def lookup(self, xy: np.ndarray, headings: np.ndarray) -> np.ndarray:
+        """Returns the interpolated true readings of a batch of poses.
+
+        Args:
+            xy (np.ndarray): (N, 2) array of tile coordinates.
+            headings (np.ndarray): (N,) array of heading indices.
+
+        Returns:
+            np.ndarray: (N,) array of readings, or (N, B) for a sensor with B beams.
+
+        A point halfway between two samples gets the mean of their readings:
+
+        >>> table = ExpectedRangeTable(np.arange(16.).reshape(2, 2, 4), resolution=1)
+        >>> table.lookup(np.array([[0., 0.], [0.5, 0.], [0.25, 1.]]), np.array([0, 0, 1]))
+        array([0., 4., 7.])
+        """
+        nx, ny = self.ranges.shape[:2]
+        gx = np.clip(xy[:, 0] * self.resolution, 0, nx - 1)
+        gy = np.clip(xy[:, 1] * self.resolution, 0, ny - 1)
+
+        # the table always holds at least 2 samples per axis
+        i0, j0 = np.minimum(gx.astype(int), nx - 2), np.minimum(gy.astype(int), ny - 2)
+        i1, j1 = i0 + 1, j0 + 1
+        fx, fy = gx - i0, gy - j0
+        if self.ranges.ndim == 4:
+            fx, fy = fx[:, None], fy[:, None]
+
+        r00 = self.ranges[i0, j0, headings]
+        r10 = self.ranges[i1, j0, headings]
+        r01 = self.ranges[i0, j1, headings]
+        r11 = self.ranges[i1, j1, headings]
+
+        readings = (r00 * (1 - fx) + r10 * fx) * (1 - fy) + (r01 * (1 - fx) + r11 * fx) * fy
+
+        # interpolating towards a "no hit" (-1) sample is meaningless, use the nearest sample instead
+        no_hit = (r00 < 0) | (r10 < 0) | (r01 < 0) | (r11 < 0)
+        if no_hit.any():
+            nearest = self.ranges[np.rint(gx).astype(int), np.rint(gy).astype(int), headings]
+            readings = np.where(no_hit, nearest, readings)
+
+        return readings
+
+    def save(self, directory: str, world, sensor: SensorBase) -> None:
+        """Saves the table along with the key of the world and the sensor it was built for (see load()).
+        """
+        # imported here, the measurement cache being part of the localization package, which imports this module
+        from model.localization.measurement_cache import measurement_cache_key
+
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'ranges.npy'), self.ranges)
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump({'resolution': self.resolution, 'shape': list(self.ranges.shape),
+                       'key': measurement_cache_key(world, sensor)}, f)
+
+    @classmethod
+    def load(cls, directory: str, world, sensor: SensorBase, mmap: bool = True) -> ExpectedRangeTable:
+        """Loads a table saved with save(). By default the readings are memory mapped,
+        so that several processes share the same pages.
+
+        Raises:
+            ValueError: if the table was built for another world or sensor, or its readings do not have the
+            saved shape.
+        """
+        from model.localization.measurement_cache import measurement_cache_key
+
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('key') != measurement_cache_key(world, sensor):
+            raise ValueError(f"The range table in '{directory}' was built for another world or sensor")
+
+        ranges = np.load(os.path.join(directory, 'ranges.npy'), mmap_mode='r' if mmap else None)
+        if list(ranges.shape) != meta['shape']:
+            raise ValueError(f"The range table in '{directory}' has the shape {ranges.shape}, "
+                             f"expected {tuple(meta['shape'])}")
+
+        return cls(ranges, meta['resolution'])
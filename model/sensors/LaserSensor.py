@@ -1,13 +1,11 @@
 from typing import Tuple, Optional
 
 import numpy as np
-import shapely
-from shapely import LineString as ShapelyLine, affinity
-
 
 from base.robot import RobotBase
 from base.sensor import SensorBase
-from definitions import TILE_SIZE, ROBOT_SIZE
+from definitions import TILE_SIZE
+from model.sensors.RayCaster import RayCaster
 
 
 class LaserSensor(SensorBase):
@@ -24,64 +22,53 @@ class LaserSensor(SensorBase):
         45
     ]
 
+    """
+    Unit vectors of the laser beam for each direction, obtained by rotating
+    the vector (0, 1) by the corresponding rotation.
+    """
+    beam_directions = np.array([[-np.sin(np.deg2rad(r)), np.cos(np.deg2rad(r))] for r in rotations])
+
     def __init__(self, world, sensor_length: float):
         self.world = world
         self.sensor_length = sensor_length
+        self.ray_caster = RayCaster(world.index)
 
         self.intersection: Optional[Tuple[float, float]] = None
 
+    def beam_vectors(self, direction: RobotBase.Direction) -> np.ndarray:
+        """Returns the (B, 2) unit vectors of the B beams of the sensor for the given direction.
+        """
+        return self.beam_directions[direction.value][None]
+
     def likelihood(self, true_measurements, measurement):
         return np.isclose(true_measurements, measurement).astype('float')
 
     def sense(self, xy: np.ndarray, direction: RobotBase.Direction) -> float:
-        gx, gy = xy * TILE_SIZE
-
-        mass_center = shapely.Point((gx, gy))
-        laser_beam_obj = self.create_laser_beam_object(gx, gy, direction)
+        distances, points = self.ray_caster.cast(np.asarray(xy) * TILE_SIZE,
+                                                 self.beam_directions[direction.value],
+                                                 self.sensor_length)
 
-        closest_dist = np.inf
-        closest_obj = None
-        try:
-            for object in self.world.objects:
-                if object.shapely_shape.geom_type == "LineString":
-                    intersection = object.shapely_shape.intersection(laser_beam_obj)
-                else:
-                    intersection = object.shapely_shape.exterior.intersection(laser_beam_obj)
-                if not intersection.is_empty:
-                    if intersection.geom_type == "LineString":
-                        intersection = intersection.boundary
-                    if intersection.geom_type == 'Point':
-                        # if intersection is a point, use envelope
-                        d = intersection.envelope.distance(mass_center)
-                        if d < closest_dist:
-                            closest_dist = d
-                            closest_obj = intersection.envelope
-                    else:
-                        # if intersection is a multipoint, iterate through the points
-                        for point in intersection.geoms:
-                            d = point.distance(mass_center)
-                            if d < closest_dist:
-                                closest_dist = d
-                                closest_obj = point
+        hit = np.isfinite(distances[0])
+        self.intersection = tuple(points[0]) if hit else None
 
-            self.intersection = (closest_obj.x, closest_obj.y) if closest_obj is not None else None
+        # default measurement can not be 'inf' because it creates issues when modelling
+        # measurement probabilities with an infinite mean:
+        # E.g: if p(i|l) ~ Norm(inf, 1), when sampling 'inf' from the pdf generates NaNs.
+        return distances[0] if hit else -1
 
-            # default measurement can not be 'inf' because it creates issues when modelling
-            # measurement probabilities with an infinite mean:
-            # E.g: if p(i|l) ~ Norm(inf, 1), when sampling 'inf' from the pdf generates NaNs.
-            return closest_dist if closest_dist != float('inf') else -1
-        except Exception as e:
-            print("Error in the particle sensing:", e)
-            return -1
-    
-    def create_laser_beam_object(self, x, y, direction: RobotBase.Direction):
-        line = ShapelyLine(
-            [[x, y], [x, y + self.sensor_length]])
-        angle = self.rotations[direction.value]
-        # get rotated sensor
-        line = affinity.rotate(line, angle, origin=(x, y))
+    def true_readings(self, xy: np.ndarray, directions: np.ndarray) -> np.ndarray:
+        """Computes the true readings of many poses with a single batched ray cast.
+        Unlike sense(), the intersection of the sensor is left untouched.
 
-        x2 = line.coords.xy[0][1]
-        y2 = line.coords.xy[1][1]
-        return ShapelyLine([[x, y], [x2, y2]])
+        Args:
+            xy (np.ndarray): (N, 2) array of tile coordinates of the sensor.
+            directions (np.ndarray): (N,) array of direction indices (see RobotBase.Direction).
 
+        Returns:
+            np.ndarray: (N,) array of readings, -1 where the laser hits nothing.
+        """
+        distances, _ = self.ray_caster.cast(np.asarray(xy) * TILE_SIZE,
+                                            self.beam_directions[np.asarray(directions, dtype=int)],
+                                            self.sensor_length)
+        distances[np.isinf(distances)] = -1
+        return distances
@@ -0,0 +1,85 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy.stats import norm
+
+from base.robot import RobotBase
+from definitions import TILE_SIZE, MEASUREMENT_SIGMA
+from model.sensors.LaserSensor import LaserSensor
+
+
+class MultiBeamLaserSensor(LaserSensor):
+    """Represents a laser scanner with certain measurements. The scanner casts num_beams beams,
+    spread evenly over an angle centered on the heading of the robot, and returns a vector of readings.
+    """
+
+    def __init__(self, world, sensor_length: float, num_beams: int = 5, spread: float = 90):
+        """
+        Args:
+            world: the world where the robot resides.
+            sensor_length (float): the length of the beams in pixels.
+            num_beams (int, optional): the number of beams. Defaults to 5.
+            spread (float, optional): the angle in degrees between the first and the last beam. Defaults to 90.
+        """
+        super().__init__(world, sensor_length)
+        self.num_beams = num_beams
+        self.spread = spread
+
+        # heading of each beam, in radians clockwise from the y axis, for each direction
+        offsets = np.deg2rad(np.linspace(-spread / 2, spread / 2, num_beams)) if num_beams > 1 else np.zeros(1)
+        angles = np.deg2rad(-np.array(self.rotations, dtype=float))[:, None] + offsets
+        self.scan_directions = np.stack([np.sin(angles), np.cos(angles)], axis=-1)
+
+        self.intersections: List[Optional[Tuple[float, float]]] = [None] * num_beams
+
+    def beam_vectors(self, direction: RobotBase.Direction) -> np.ndarray:
+        return self.scan_directions[direction.value]
+
+    def likelihood(self, true_measurements, measurement):
+        # joint likelihood of all the beams
+        return np.isclose(true_measurements, measurement).all(axis=-1).astype('float')
+
+    def sense(self, xy: np.ndarray, direction: RobotBase.Direction) -> np.ndarray:
+        origins = np.broadcast_to(np.asarray(xy) * TILE_SIZE, (self.num_beams, 2))
+        distances, points = self.ray_caster.cast(origins, self.beam_vectors(direction), self.sensor_length)
+
+        hit = np.isfinite(distances)
+        self.intersections = [tuple(p) if h else None for p, h in zip(points, hit)]
+        self.intersection = self.intersections[self.num_beams // 2]
+
+        return np.where(hit, distances, -1)
+
+    def true_readings(self, xy: np.ndarray, directions: np.ndarray) -> np.ndarray:
+        """Computes the true readings of many poses with a single batched ray cast.
+
+        Args:
+            xy (np.ndarray): (N, 2) array of tile coordinates of the sensor.
+            directions (np.ndarray): (N,) array of direction indices (see RobotBase.Direction).
+
+        Returns:
+            np.ndarray: (N, num_beams) array of readings, -1 where a beam hits nothing.
+        """
+        origins = np.repeat(np.asarray(xy) * TILE_SIZE, self.num_beams, axis=0)
+        beams = self.scan_directions[np.asarray(directions, dtype=int)].reshape(-1, 2)
+
+        distances, _ = self.ray_caster.cast(origins, beams, self.sensor_length)
+        distances[np.isinf(distances)] = -1
+        return distances.reshape(-1, self.num_beams)
+
+
+class UncertainMultiBeamLaserSensor(MultiBeamLaserSensor):
+    """Represents an uncertain laser scanner. Each beam is subject to independent gaussian noise.
+    """
+
+    def sense(self, xy: np.ndarray, direction: RobotBase.Direction) -> np.ndarray:
+        reading = self.true_reading(xy, direction)
+        return reading + np.random.normal(0, MEASUREMENT_SIGMA, size=self.num_beams)
+
+    def true_reading(self, xy: np.ndarray, direction: RobotBase.Direction):
+        return super().sense(xy, direction)
+
+    def likelihood(self, true_measurements, measurement):
+        # joint likelihood of the independent beams, up to a constant factor: the log-likelihoods
+        # are shifted by their maximum to keep the product of many small densities from underflowing
+        log_likelihood = norm.logpdf(measurement, true_measurements, MEASUREMENT_SIGMA).sum(axis=-1)
+        return np.exp(log_likelihood - log_likelihood.max())
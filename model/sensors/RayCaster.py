@@ -0,0 +1,120 @@
+from typing import Tuple
+
+import numpy as np
+import shapely
+from shapely import STRtree
+
+
+class RayCaster:
+    """Casts batches of laser beams against the boundaries of the obstacles of a world.
+
+    The boundaries of all the obstacles are compiled once into arrays of edges, such that
+    many rays (with arbitrary origins and headings) can be intersected with the edges in a
+    single vectorized computation. With many edges, the spatial index of the obstacles is
+    queried first, such that each ray is only tested against the edges of the obstacles
+    whose bounding box it crosses.
+    """
+
+    """
+    Below this number of edges, testing every ray against every edge is cheaper than querying the index.
+    """
+    INDEX_MIN_EDGES = 256
+
+    def __init__(self, index: STRtree, max_pairs: int = 2 ** 22) -> None:
+        """Compiles the boundaries of the indexed shapes into edge arrays.
+
+        Args:
+            index (STRtree): spatial index over the shapely shapes of the obstacles. Polygons
+            contribute the edges of their exterior, line strings their own segments.
+            max_pairs (int, optional): maximum number of (ray, edge) pairs evaluated at once.
+            Bounds the memory used by a single cast, larger batches are split in chunks.
+        """
+        starts, ends = [], []
+        for shape in index.geometries:
+            boundary = shape if shape.geom_type == "LineString" else shape.exterior
+            coords = np.asarray(boundary.coords, dtype=float)[:, :2]
+            starts.append(coords[:-1])
+            ends.append(coords[1:])
+
+        self.index = index
+        self.edge_starts = np.concatenate(starts) if starts else np.empty((0, 2))
+        self.edge_vectors = np.concatenate(ends) - self.edge_starts if ends else np.empty((0, 2))
+        # the edges of the i-th shape are edge_offsets[i]:edge_offsets[i] + edge_counts[i]
+        self.edge_counts = np.array([len(s) for s in starts], dtype=np.int64)
+        self.edge_offsets = np.cumsum(self.edge_counts) - self.edge_counts
+        self.max_pairs = max_pairs
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edge_starts)
+
+    def cast(self, origins: np.ndarray, directions: np.ndarray, length: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Casts one ray per origin, along the corresponding direction, up to the given length.
+
+        Args:
+            origins (np.ndarray): (N, 2) array of pixel coordinates where the rays start.
+            directions (np.ndarray): (N, 2) array of unit vectors, the headings of the rays.
+            length (float): the length of the rays in pixels.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: a (N,) array with the distance to the closest
+            intersection of each ray (inf when the ray hits nothing) and a (N, 2) array with
+            the coordinates of those intersections (NaN when the ray hits nothing).
+        """
+        origins = np.asarray(origins, dtype=float).reshape(-1, 2)
+        directions = np.broadcast_to(np.asarray(directions, dtype=float).reshape(-1, 2), origins.shape)
+
+        distances = np.full(len(origins), np.inf)
+        if self.num_edges:
+            use_index = self.num_edges >= self.INDEX_MIN_EDGES
+            cast_chunk = self._cast_chunk_indexed if use_index else self._cast_chunk
+            chunk = max(1, self.max_pairs // (self.INDEX_MIN_EDGES if use_index else self.num_edges))
+            for start in range(0, len(origins), chunk):
+                stop = start + chunk
+                distances[start:stop] = cast_chunk(origins[start:stop], directions[start:stop], length)
+
+        with np.errstate(invalid='ignore'):
+            points = origins + distances[:, None] * directions
+        return distances, points
+
+    def _cast_chunk(self, origins: np.ndarray, directions: np.ndarray, length: float) -> np.ndarray:
+        # test every ray against every edge
+        t = self._intersect(origins[:, None], directions[:, None], self.edge_starts, self.edge_vectors, length)
+
+        return t.min(axis=1)
+
+    def _cast_chunk_indexed(self, origins: np.ndarray, directions: np.ndarray, length: float) -> np.ndarray:
+        # find the candidate (ray, shape) pairs and expand them to (ray, edge) pairs
+        beams = shapely.linestrings(np.stack([origins, origins + length * directions], axis=1))
+        ray, shape = self.index.query(beams)
+
+        counts = self.edge_counts[shape]
+        ray = np.repeat(ray, counts)
+        edge = np.arange(counts.sum()) + np.repeat(self.edge_offsets[shape] - (np.cumsum(counts) - counts), counts)
+
+        t = self._intersect(origins[ray], directions[ray], self.edge_starts[edge], self.edge_vectors[edge], length)
+
+        distances = np.full(len(origins), np.inf)
+        np.minimum.at(distances, ray, t)
+        return distances
+
+    @staticmethod
+    def _intersect(origins: np.ndarray, directions: np.ndarray, edge_starts: np.ndarray, edge_vectors: np.ndarray,
+                   length: float) -> np.ndarray:
+        # Solve origin + t * direction = edge_start + u * edge_vector for each (ray, edge) pair of the
+        # broadcast arrays, using 2D cross products. The ray hits the edge when 0 <= t <= length and
+        # 0 <= u <= 1. Returns t where the ray hits the edge, inf elsewhere.
+        dx, dy = directions[..., 0], directions[..., 1]
+        ex, ey = edge_vectors[..., 0], edge_vectors[..., 1]
+        wx = edge_starts[..., 0] - origins[..., 0]
+        wy = edge_starts[..., 1] - origins[..., 1]
+
+        denominator = dx * ey - dy * ex
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (wx * ey - wy * ex) / denominator
+            u = (wx * dy - wy * dx) / denominator
+
+        eps = 1e-9
+        hit = (denominator != 0) & (u >= -eps) & (u <= 1 + eps) & (t >= -eps) & (t <= length + eps)
+
+        return np.where(hit, np.maximum(t, 0), np.inf)
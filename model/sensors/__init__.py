@@ -1,2 +1,5 @@
 from model.sensors.LaserSensor import LaserSensor
 from model.sensors.UncertainLaserSensor import UncertainLaserSensor
+from model.sensors.MultiBeamLaserSensor import MultiBeamLaserSensor, UncertainMultiBeamLaserSensor
+from model.sensors.RayCaster import RayCaster
+from model.sensors.ExpectedRangeTable import ExpectedRangeTable
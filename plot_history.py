@@ -0,0 +1,47 @@
+"""
+Plots frames of a history recorded by simulation.recorder.HistoryRecorder (see RECORD_HISTORY_DIR
+of the definitions, or the --record option of simulate.py). E.g:
+
+    $ python plot_history.py history --frames 0 100 -1 --output plots
+"""
+
+import argparse
+import os
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Plot the recorded beliefs or particles of a localization.")
+    parser.add_argument('directory', help="directory of the history.")
+    parser.add_argument('--frames', type=int, nargs='+', default=[-1],
+                        help="indices of the frames to plot, negative from the end. Defaults to the last one.")
+    parser.add_argument('--output', default='plots', help="directory of the plots. Defaults to plots.")
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    from simulation.recorder import HistoryReader
+    history = HistoryReader(args.directory)
+
+    # the definitions are evaluated on import, so the world of the history must be set beforehand
+    for variable, key in (('LOCALIZATION_ENVIRONMENT', 'environment'), ('LOCALIZATION_SCALE', 'scale')):
+        if key in history.metadata:
+            os.environ[variable] = str(history.metadata[key])
+
+    from definitions import RES_WIDTH, RES_HEIGHT, ROBOT_SIZE, TILE_SIZE
+    from view.plots import BeliefFigure, plot_particles
+
+    os.makedirs(args.output, exist_ok=True)
+    belief_figure = None
+    for i in args.frames:
+        step, pose = int(history.steps[i]), history.poses[i]
+        path = os.path.join(args.output, f"{history.kind}_{step}.png")
+        if history.kind == 'belief':
+            belief_figure = belief_figure or BeliefFigure(*history.shape[:2])
+            belief_figure.draw(history[i], int(pose[2]))
+            belief_figure.save(path)
+        else:
+            plot_particles(history[i], (pose[:2] + ROBOT_SIZE) * TILE_SIZE, RES_WIDTH, RES_HEIGHT, path)
+        print(f"Step {step}: {path}")
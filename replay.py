@@ -0,0 +1,88 @@
+"""
+Records the actions and sensor readings of a headless run to a log, or replays a log into a new
+localization as fast as possible, without simulating the robot. E.g:
+
+    $ python replay.py record run.log --sim-type CONTINUOUS --steps 10000 --seed 0
+    $ python replay.py run run.log --error
+
+The environment, scale, simulation type and number of beams of a replay are the ones stored in the log.
+"""
+
+import argparse
+import os
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Record or replay the inputs of the localization.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help="run the localization headless and record its inputs.")
+    record.add_argument('log', help="path of the log to write.")
+    record.add_argument('--sim-type', choices=['DISCRETE', 'CONTINUOUS'],
+                        help="DiscreteRobot with Markov localization or ContinuousRobot with Monte Carlo "
+                             "localization. Defaults to SIM_TYPE of the definitions.")
+    record.add_argument('--environment', help="one of the environments of the definitions.")
+    record.add_argument('--scale', type=int, help="scaling of the environment.")
+    record.add_argument('--steps', type=int, default=1000, help="number of steps to run. Defaults to 1000.")
+    record.add_argument('--kidnap-probability', type=float, default=0.,
+                        help="probability of kidnapping the robot at each step. Defaults to 0.")
+    record.add_argument('--seed', type=int, help="seed of the random number generator.")
+
+    run = commands.add_parser('run', help="replay a log into a new localization.")
+    run.add_argument('log', help="path of the log to replay.")
+    run.add_argument('--seed', type=int, help="seed of the random number generator.")
+    run.add_argument('--error', action='store_true',
+                     help="report the mean error of the estimated position against the recorded one.")
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    if args.command == 'record':
+        overrides = (('LOCALIZATION_SIM_TYPE', args.sim_type), ('LOCALIZATION_ENVIRONMENT', args.environment),
+                     ('LOCALIZATION_SCALE', args.scale))
+    else:
+        # the log only makes sense in the world where it was recorded
+        from simulation.replay_log import read_log
+        metadata, _ = read_log(args.log)
+        overrides = (('LOCALIZATION_SIM_TYPE', metadata['sim_type']),
+                     ('LOCALIZATION_ENVIRONMENT', metadata['environment']),
+                     ('LOCALIZATION_SCALE', metadata['scale']),
+                     ('LOCALIZATION_NUM_BEAMS', metadata['num_beams']))
+
+    # the definitions are evaluated on import, so the overrides must be set beforehand
+    for variable, value in overrides:
+        if value is not None:
+            os.environ[variable] = str(value)
+
+    import numpy as np
+
+    from definitions import SIM_TYPE, ENVIRONMENT, SCALE, ROBOT_SIZE
+    from simulation.engine import Simulation
+    from simulation.replay import record, replay
+
+    if args.seed is not None:
+        np.random.seed(args.seed)
+
+    simulation = Simulation(SIM_TYPE)
+
+    if args.command == 'record':
+        record(simulation, args.log, args.steps, args.kidnap_probability)
+        print(f"Recorded {args.steps} steps of {SIM_TYPE} localization on '{ENVIRONMENT}' (scale {SCALE}) "
+              f"to {args.log}")
+    else:
+        _, records = read_log(args.log)
+        errors = []
+
+        def error(_, entry):
+            x, y, _ = simulation.localization.estimate()
+            errors.append(np.hypot(x - entry['pose'][0] - ROBOT_SIZE, y - entry['pose'][1] - ROBOT_SIZE))
+
+        elapsed = replay(records, simulation.localization, error if args.error else None)
+
+        print(f"Replayed {len(records)} records of {SIM_TYPE} localization on '{ENVIRONMENT}' (scale {SCALE}): "
+              f"{elapsed:.3f}s ({len(records) / elapsed:.1f} records/s)")
+        if args.error:
+            print(f"Mean error {np.mean(errors):.2f} tiles, final error {errors[-1]:.2f} tiles")
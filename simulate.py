@@ -0,0 +1,71 @@
+"""
+Runs the localization headless (without any window), with random actions,
+as fast as the CPU allows. E.g:
+
+    $ python simulate.py --sim-type DISCRETE --environment symmetric_rooms --steps 1000
+"""
+
+import argparse
+import os
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the localization without rendering.")
+    parser.add_argument('--sim-type', choices=['DISCRETE', 'CONTINUOUS'],
+                        help="DiscreteRobot with Markov localization or ContinuousRobot with Monte Carlo "
+                             "localization. Defaults to SIM_TYPE of the definitions.")
+    parser.add_argument('--environment', help="one of the environments of the definitions.")
+    parser.add_argument('--scale', type=int, help="scaling of the environment.")
+    parser.add_argument('--steps', type=int, default=1000, help="number of steps to run. Defaults to 1000.")
+    parser.add_argument('--seed', type=int, help="seed of the random number generator.")
+    parser.add_argument('--profile', action='store_true', help="print the timings of the phases of the steps.")
+    parser.add_argument('--record', metavar='DIRECTORY',
+                        help="record the belief or the particles of each step to the directory. "
+                             "Defaults to RECORD_HISTORY_DIR of the definitions.")
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    # the definitions are evaluated on import, so the overrides must be set beforehand
+    for variable, value in (('LOCALIZATION_SIM_TYPE', args.sim_type),
+                            ('LOCALIZATION_ENVIRONMENT', args.environment),
+                            ('LOCALIZATION_SCALE', args.scale)):
+        if value is not None:
+            os.environ[variable] = str(value)
+
+    import numpy as np
+
+    from base.profiling import profiler
+    from definitions import SIM_TYPE, ENVIRONMENT, SCALE, RECORD_HISTORY_DIR, RECORD_COMPRESSION, RECORD_EVERY
+    from simulation.engine import Simulation
+    from simulation.recorder import HistoryRecorder
+
+    if args.seed is not None:
+        np.random.seed(args.seed)
+    if args.profile:
+        profiler.enabled = True
+
+    simulation = Simulation(SIM_TYPE)
+
+    recorder = None
+    record_dir = args.record or RECORD_HISTORY_DIR
+    if record_dir:
+        recorder = HistoryRecorder(simulation.robot, record_dir, RECORD_COMPRESSION, RECORD_EVERY,
+                                   sim_type=SIM_TYPE, environment=ENVIRONMENT, scale=SCALE)
+
+    elapsed = simulation.run(args.steps)
+
+    if recorder is not None:
+        recorder.close()
+
+    print(f"{SIM_TYPE} localization on '{ENVIRONMENT}' (scale {SCALE}): "
+          f"{args.steps} steps in {elapsed:.3f}s ({args.steps / elapsed:.1f} steps/s)")
+
+    if args.profile:
+        print(f"{'phase':<12}{'calls':>8}{'total [s]':>12}{'p50 [ms]':>10}{'p90 [ms]':>10}{'p99 [ms]':>10}")
+        for phase, stats in profiler.summary().items():
+            print(f"{phase:<12}{stats['count']:>8}{stats['total']:>12.3f}"
+                  f"{stats['p50'] * 1e3:>10.3f}{stats['p90'] * 1e3:>10.3f}{stats['p99'] * 1e3:>10.3f}")
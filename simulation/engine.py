@@ -0,0 +1,83 @@
+import time
+from typing import Optional
+
+import numpy as np
+
+from base.robot import RobotBase
+from definitions import *
+from model.continuous_world import ContinuousWorld
+from model.grid_world import GridWorld
+from model.localization import MonteCarloLocalization, UncertainMarkovLocalization, HierarchicalMarkovLocalization
+from model.movement_model import UncertainMovementModel
+from model.robots import ContinuousRobot, DiscreteRobot
+from model.sensors import UncertainLaserSensor, UncertainMultiBeamLaserSensor, ExpectedRangeTable
+
+
+class Simulation:
+    """Headless simulation of a robot localizing itself: the world, the sensor, the localization
+    and the robot, without any rendering. Views can be attached to its members (see main.py).
+    """
+
+    def __init__(self, sim_type: str = SIM_TYPE, range_table: Optional[ExpectedRangeTable] = None) -> None:
+        """Creates the simulation according to the definitions.
+
+        Args:
+            sim_type (str, optional): 'DISCRETE' for a grid world with Markov localization,
+            'CONTINUOUS' for a continuous world with Monte Carlo localization. Defaults to SIM_TYPE.
+            range_table (ExpectedRangeTable, optional): a prebuilt range table of the Monte Carlo localization,
+            e.g. shared by several simulations. By default, it is built when RANGE_TABLE_RESOLUTION is set.
+        """
+        self.sim_type = sim_type
+
+        if sim_type == "DISCRETE":
+            self.world = GridWorld(RES_WIDTH, RES_HEIGHT, TILE_SIZE)
+            self.sensor = self.make_sensor(self.world)
+            movement_model = UncertainMovementModel(np.array([0.8, 0.2, 0.0]))
+            if HIERARCHY_FACTORS:
+                self.localization = HierarchicalMarkovLocalization(self.world, self.sensor, movement_model,
+                                                                   HIERARCHY_FACTORS, HIERARCHY_SAMPLES)
+            else:
+                self.localization = UncertainMarkovLocalization(self.world, self.sensor, movement_model,
+                                                                log_space=LOG_SPACE_BELIEF, tracking=TRACKING_WINDOW)
+            self.robot = DiscreteRobot(self.world, ROBOT_START_X, ROBOT_START_Y, self.sensor, self.localization)
+
+        elif sim_type == "CONTINUOUS":
+            self.world = ContinuousWorld(RES_WIDTH, RES_HEIGHT, TILE_SIZE)
+            self.sensor = self.make_sensor(self.world)
+            if range_table is None and RANGE_TABLE_RESOLUTION:
+                range_table = ExpectedRangeTable.build(self.sensor, RES_WIDTH // TILE_SIZE, RES_HEIGHT // TILE_SIZE,
+                                                       RANGE_TABLE_RESOLUTION)
+            self.localization = MonteCarloLocalization(self.world, self.sensor, NUM_PARTICLES, range_table,
+                                                       KLD_SAMPLING, RESAMPLER)
+            self.robot = ContinuousRobot(self.world, ROBOT_START_X, ROBOT_START_Y, self.sensor, self.localization)
+
+        else:
+            raise ValueError(f"Unknown simulation type '{sim_type}', expected 'DISCRETE' or 'CONTINUOUS'")
+
+    @staticmethod
+    def make_sensor(world):
+        if NUM_BEAMS > 1:
+            return UncertainMultiBeamLaserSensor(world, SENSOR_LENGTH, NUM_BEAMS, BEAM_SPREAD)
+        return UncertainLaserSensor(world, SENSOR_LENGTH)
+
+    @staticmethod
+    def random_action() -> RobotBase.Action:
+        return RobotBase.Action(int(np.random.random() * 4))
+
+    def step(self, action: Optional[RobotBase.Action] = None, dt: float = 1 / SIM_RATE) -> None:
+        """Moves the robot once, which makes the localization act and see.
+        A random action is used when none is given.
+        """
+        self.robot.move(action if action is not None else self.random_action(), dt)
+
+    def run(self, steps: int) -> float:
+        """Runs the given number of random steps as fast as possible.
+
+        Returns:
+            float: the elapsed wall time in seconds.
+        """
+        start = time.perf_counter()
+        for _ in range(steps):
+            self.step()
+
+        return time.perf_counter() - start
@@ -0,0 +1,144 @@
+"""
+Evaluation of the localization over many independent episodes, run in parallel by a pool of processes.
+Each episode starts the robot at a random pose, moves it randomly and possibly kidnaps it, and reports
+how fast and how well the localization found the robot.
+"""
+
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from base.robot import RobotBase
+from definitions import *
+from model.continuous_world import ContinuousWorld
+from model.grid_world import GridWorld
+from model.sensors import ExpectedRangeTable
+from simulation.engine import Simulation
+
+
+def free_tiles(world) -> np.ndarray:
+    """Returns the (N, 2) coordinates of the tiles where the center of the robot can be.
+    """
+    if isinstance(world, GridWorld):
+        return np.argwhere(world.walkable)
+
+    i, j = np.meshgrid(np.arange(RES_WIDTH // TILE_SIZE), np.arange(RES_HEIGHT // TILE_SIZE), indexing='ij')
+    tiles = np.stack([i.ravel(), j.ravel()], axis=1)
+    centers = (tiles + ROBOT_SIZE) * TILE_SIZE
+    return tiles[~world.is_occupied_batch(centers[:, 0], centers[:, 1])]
+
+
+def kidnap(simulation: Simulation, tiles: np.ndarray) -> None:
+    """Teleports the robot to one of the given tiles, with a random orientation.
+    """
+    x, y = tiles[np.random.randint(len(tiles))]
+    simulation.robot.orientation = RobotBase.Direction(np.random.randint(len(RobotBase.Direction)))
+    simulation.robot.teleport(int(x) * TILE_SIZE + TILE_SIZE // 2, int(y) * TILE_SIZE + TILE_SIZE // 2)
+
+
+def run_episode(sim_type: str, seed: int, steps: int, kidnap_probability: float = 0., threshold: float = 1.,
+                range_table: Optional[ExpectedRangeTable] = None) -> Dict[str, object]:
+    """Runs one episode from a random start pose, with random actions.
+
+    Args:
+        sim_type (str): 'DISCRETE' or 'CONTINUOUS', see Simulation.
+        seed (int): the seed of the random number generator of the episode.
+        steps (int): the number of steps of the episode.
+        kidnap_probability (float, optional): the probability of kidnapping the robot at each step. Defaults to 0.
+        threshold (float, optional): the error in tiles below which the robot is localized. Defaults to 1.
+        range_table (ExpectedRangeTable, optional): a prebuilt range table, see Simulation.
+
+    Returns:
+        Dict[str, object]: the seed, the steps at which the robot was kidnapped, the convergence step (the first
+        step from which the error stays below the threshold after the last kidnap, None if the robot is not
+        localized at the end), the final error in tiles, whether the final orientation is right, and the mean
+        time per step in seconds.
+    """
+    np.random.seed(seed)
+    simulation = Simulation(sim_type, range_table)
+    tiles = free_tiles(simulation.world)
+    kidnap(simulation, tiles)
+
+    errors = np.empty(steps)
+    kidnaps = []
+    elapsed = 0.
+    for step in range(steps):
+        if np.random.random() < kidnap_probability:
+            kidnap(simulation, tiles)
+            kidnaps.append(step)
+
+        start = time.perf_counter()
+        simulation.step()
+        elapsed += time.perf_counter() - start
+
+        x, y, _ = simulation.localization.estimate()
+        center = simulation.robot.position + ROBOT_SIZE
+        errors[step] = np.hypot(x - center[0], y - center[1])
+
+    # first step of the last run of errors below the threshold, after the last kidnap
+    first = kidnaps[-1] if kidnaps else 0
+    lost, = np.nonzero(errors[first:] >= threshold)
+    convergence_step = first + (lost[-1] + 1 if len(lost) else 0)
+
+    return {
+        'seed': seed,
+        'kidnaps': kidnaps,
+        'convergence_step': int(convergence_step) if convergence_step < steps else None,
+        'final_error': float(errors[-1]),
+        'orientation_correct': simulation.localization.estimate()[2] == simulation.robot.orientation.value,
+        'time_per_step': elapsed / steps,
+    }
+
+
+# range table shared by the episodes of a worker process
+_range_table: Optional[ExpectedRangeTable] = None
+
+
+def _init_worker(range_table_dir: Optional[str]) -> None:
+    global _range_table
+    if range_table_dir is not None:
+        world = ContinuousWorld(RES_WIDTH, RES_HEIGHT, TILE_SIZE)
+        _range_table = ExpectedRangeTable.load(range_table_dir, world, Simulation.make_sensor(world))
+
+
+def _run_episode(args) -> Dict[str, object]:
+    return run_episode(*args, range_table=_range_table)
+
+
+def evaluate(sim_type: str, episodes: int, steps: int, kidnap_probability: float = 0., threshold: float = 1.,
+             seed: int = 0, processes: Optional[int] = None) -> Iterator[Dict[str, object]]:
+    """Runs independent episodes (see run_episode) over a pool of processes and yields their results
+    as soon as they complete, in any order.
+
+    The data of the map is computed once, before the pool starts: the precomputed measurements of the Markov
+    localization are written to MEASUREMENT_CACHE_DIR, and the range table of the Monte Carlo localization
+    is saved to a temporary directory that every worker memory maps. The seed of each episode is derived
+    from the given seed, so the results do not depend on the number of processes.
+
+    Args:
+        sim_type (str): 'DISCRETE' or 'CONTINUOUS', see Simulation.
+        episodes (int): the number of episodes.
+        steps (int): the number of steps of each episode.
+        kidnap_probability (float, optional): the probability of kidnapping the robot at each step. Defaults to 0.
+        threshold (float, optional): the error in tiles below which the robot is localized. Defaults to 1.
+        seed (int, optional): the seed of the episode seeds. Defaults to 0.
+        processes (int, optional): the number of worker processes. Defaults to the number of CPUs.
+    """
+    seeds: List[int] = np.random.SeedSequence(seed).generate_state(episodes).tolist()
+    tasks = [(sim_type, episode_seed, steps, kidnap_probability, threshold) for episode_seed in seeds]
+
+    with tempfile.TemporaryDirectory() as directory:
+        range_table_dir = None
+        # building a simulation warms the measurement cache, and the range table if any
+        simulation = Simulation(sim_type)
+        range_table = getattr(simulation.localization, 'range_table', None)
+        if range_table is not None:
+            range_table_dir = os.path.join(directory, 'range_table')
+            range_table.save(range_table_dir, simulation.world, simulation.sensor)
+
+        with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(range_table_dir,)) as pool:
+            yield from pool.imap_unordered(_run_episode, tasks)
@@ -0,0 +1,204 @@
+"""
+History of a localization: the belief of a Markov localization, or the particles of a Monte Carlo
+localization, along with the true pose of the robot, recorded at every step into a directory:
+
+- meta.json: what the frames hold (kind, dtype and shape), their compression and the downsampling.
+- data.bin: the frames, appended one after the other, zlib compressed or raw.
+- index.bin: one fixed-size entry per frame (step, true pose, offset and size in bytes, number of elements).
+
+Both binary files are append-only, so a history can be read while it is being recorded, up to its last
+flushed frame. Uncompressed frames are memory mapped by the reader, without any copy. The module does not
+import the definitions, so that a history can be read before setting them up.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import zlib
+from typing import TYPE_CHECKING, Callable, Dict, Tuple, Union
+
+import numpy as np
+
+from base.observer_pattern import Observer
+
+if TYPE_CHECKING:
+    from base.robot import RobotBase
+
+INDEX_DTYPE = np.dtype([('step', np.uint64), ('pose', np.float32, (3,)), ('offset', np.uint64),
+                        ('size', np.uint64), ('length', np.uint64)])
+PARTICLE_DTYPE = np.dtype([('x', np.float32), ('y', np.float32), ('heading', np.uint8), ('weight', np.float32)])
+
+
+class HistoryWriter:
+    """Appends frames to a new history. Use as a context manager, or call close().
+    """
+
+    def __init__(self, directory: str, kind: str, compression: int = 0, every: int = 1,
+                 shape: Tuple[int, ...] = (), flush_every: int = 1, **metadata) -> None:
+        """
+        Args:
+            directory (str): the directory of the history, whose files are overwritten.
+            kind (str): 'belief' for (width, height, 8) beliefs, 'particles' for arrays of PARTICLE_DTYPE.
+            compression (int, optional): the zlib level of the frames, 0 to store them raw. Defaults to 0.
+            every (int, optional): the number of steps between two recorded frames. Defaults to 1.
+            shape (Tuple[int, ...], optional): the shape of the beliefs.
+            flush_every (int, optional): the number of recorded frames between two flushes to the files,
+            which makes them readable while recording. Defaults to 1.
+            metadata: JSON serializable information stored with the history, e.g. the environment.
+        """
+        if kind not in ('belief', 'particles'):
+            raise ValueError(f"Unknown kind of history '{kind}', expected 'belief' or 'particles'")
+
+        self.kind = kind
+        self.compression = compression
+        self.every = every
+        self.flush_every = flush_every
+        self.dtype = np.dtype(np.float32) if kind == 'belief' else PARTICLE_DTYPE
+
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump({'kind': kind, 'compression': compression, 'every': every, 'shape': list(shape),
+                       **metadata}, f)
+
+        self.data = open(os.path.join(directory, 'data.bin'), 'wb')
+        self.index = open(os.path.join(directory, 'index.bin'), 'wb')
+        self.offset = 0
+        self.frames = 0
+
+    def write(self, step: int, frame: Union[np.ndarray, Callable[[], np.ndarray]],
+              pose: Tuple[float, float, int]) -> None:
+        """Appends a frame, unless the step is skipped by the downsampling.
+
+        Args:
+            step (int): the step of the frame.
+            frame (np.ndarray or Callable[[], np.ndarray]): the frame, or a function returning it, only called
+            when the step is recorded.
+            pose (Tuple[float, float, int]): the true pose of the robot, x and y in tiles and orientation.
+        """
+        if step % self.every:
+            return
+
+        if callable(frame):
+            frame = frame()
+        frame = np.ascontiguousarray(frame, dtype=self.dtype)
+        payload = frame.tobytes()
+        if self.compression:
+            payload = zlib.compress(payload, self.compression)
+        self.data.write(payload)
+
+        entry = np.array([(step, pose, self.offset, len(payload), frame.size)], dtype=INDEX_DTYPE)
+        self.index.write(entry.tobytes())
+        self.offset += len(payload)
+
+        self.frames += 1
+        if self.frames % self.flush_every == 0:
+            self.flush()
+
+    def flush(self) -> None:
+        # the data first, such that the index never refers to frames not written yet
+        self.data.flush()
+        self.index.flush()
+
+    def close(self) -> None:
+        self.data.close()
+        self.index.close()
+
+    def __enter__(self) -> HistoryWriter:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class HistoryReader:
+    """Reads the frames of a history, e.g. history[-1] for the last recorded frame.
+    """
+
+    def __init__(self, directory: str) -> None:
+        with open(os.path.join(directory, 'meta.json')) as f:
+            self.metadata: Dict[str, object] = json.load(f)
+
+        self.kind = self.metadata['kind']
+        self.shape = tuple(self.metadata['shape'])
+        self.dtype = np.dtype(np.float32) if self.kind == 'belief' else PARTICLE_DTYPE
+
+        path = os.path.join(directory, 'data.bin')
+        self.data = np.memmap(path, dtype=np.uint8, mode='r') if os.path.getsize(path) else np.empty(0, np.uint8)
+
+        # a history being recorded may end with a partial entry, or entries of frames not written yet
+        index = np.fromfile(os.path.join(directory, 'index.bin'), dtype=np.uint8)
+        index = index[:len(index) // INDEX_DTYPE.itemsize * INDEX_DTYPE.itemsize].view(INDEX_DTYPE)
+        self.index = index[index['offset'] + index['size'] <= len(self.data)]
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def steps(self) -> np.ndarray:
+        return self.index['step']
+
+    @property
+    def poses(self) -> np.ndarray:
+        """The (N, 3) true poses of the robot of the frames: x and y in tiles, orientation.
+        """
+        return self.index['pose']
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        """Returns a (width, height, 8) belief, or an (N,) array of PARTICLE_DTYPE particles.
+        """
+        entry = self.index[i]
+        payload = self.data[int(entry['offset']):int(entry['offset'] + entry['size'])]
+        if self.metadata['compression']:
+            frame = np.frombuffer(zlib.decompress(payload), dtype=self.dtype)
+        else:
+            frame = payload.view(self.dtype)
+
+        return frame.reshape(self.shape) if self.kind == 'belief' else frame
+
+
+class HistoryRecorder(Observer):
+    """Records the belief or the particles of the localization of a robot each time the robot moves.
+    """
+
+    def __init__(self, robot: RobotBase, directory: str, compression: int = 0, every: int = 1,
+                 **metadata) -> None:
+        """
+        Args:
+            robot (RobotBase): the robot, whose localization is either a MonteCarloLocalization or has a belief.
+            directory (str): the directory of the history.
+            compression (int, optional): the zlib level of the frames, 0 to store them raw. Defaults to 0.
+            every (int, optional): the number of steps between two recorded frames. Defaults to 1.
+            metadata: JSON serializable information stored with the history, e.g. the environment.
+        """
+        self.robot = robot
+        self.step = 0
+
+        if hasattr(robot.localization, 'particles'):
+            self.writer = HistoryWriter(directory, 'particles', compression, every, **metadata)
+        else:
+            shape = robot.localization.belief.shape
+            self.writer = HistoryWriter(directory, 'belief', compression, every, shape, **metadata)
+
+        self.robot.on_move.subscribe(self)
+
+    def update(self) -> None:
+        self.step += 1
+        x, y = self.robot.position
+        self.writer.write(self.step, self._frame, (x, y, self.robot.orientation.value))
+
+    def _frame(self) -> np.ndarray:
+        localization = self.robot.localization
+        if self.writer.kind == 'belief':
+            return localization.belief
+
+        particles = localization.particles
+        frame = np.empty(len(particles), dtype=PARTICLE_DTYPE)
+        frame['x'], frame['y'] = particles.x, particles.y
+        frame['heading'], frame['weight'] = particles.heading, particles.weight
+        return frame
+
+    def close(self) -> None:
+        self.robot.on_move.unsubscribe(self)
+        self.writer.close()
+
@@ -0,0 +1,106 @@
+"""
+Recording and offline replay of the inputs of a localization (see simulation/replay_log.py): a log is
+fed to a localization as fast as possible, without simulating the robot or its world.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from base.localization import LocalizationBase
+from base.robot import RobotBase
+from definitions import ENVIRONMENT, SCALE
+from simulation.engine import Simulation
+from simulation.evaluation import free_tiles, kidnap
+from simulation.replay_log import KIDNAPPED, LogWriter
+
+
+class RecordingLocalization(LocalizationBase):
+    """Wraps the localization of a robot and writes a record of every action and reading it receives.
+    Any other attribute is the one of the wrapped localization.
+    """
+
+    def __init__(self, localization: LocalizationBase, writer: LogWriter, robot: RobotBase) -> None:
+        self.localization = localization
+        self.writer = writer
+        self.robot = robot
+        self.action: Optional[RobotBase.Action] = None
+
+    def __getattr__(self, name: str):
+        return getattr(self.localization, name)
+
+    def _pose(self) -> Tuple[float, float, int]:
+        x, y = self.robot.position
+        return x, y, self.robot.orientation.value
+
+    def act(self, action: RobotBase.Action) -> None:
+        self.action = action
+        self.localization.act(action)
+
+    def see(self, measurement) -> None:
+        self.writer.write(self.action.value, measurement, self._pose())
+        self.localization.see(measurement)
+
+    def estimate(self) -> Tuple[float, float, int]:
+        return self.localization.estimate()
+
+    def notify_kidnapped(self) -> None:
+        self.writer.write(KIDNAPPED, np.nan, self._pose())
+        self.localization.notify_kidnapped()
+
+
+def replay(records: np.ndarray, localization: LocalizationBase,
+           callback: Optional[Callable[[int, np.void], None]] = None) -> float:
+    """Feeds the records of a log to a localization, as fast as possible.
+
+    Args:
+        records (np.ndarray): the records of a log, see read_log().
+        localization (LocalizationBase): the localization, in its initial state.
+        callback (Callable, optional): called with the index and the record after each record.
+
+    Returns:
+        float: the elapsed wall time in seconds, callbacks included.
+    """
+    actions = {action.value: action for action in RobotBase.Action}
+    readings = np.asarray(records['reading'], dtype=float)
+
+    start = time.perf_counter()
+    for i, code in enumerate(records['action'].tolist()):
+        if code == KIDNAPPED:
+            localization.notify_kidnapped()
+        else:
+            localization.act(actions[code])
+            localization.see(readings[i])
+
+        if callback is not None:
+            callback(i, records[i])
+
+    return time.perf_counter() - start
+
+
+def record(simulation: Simulation, path: str, steps: int, kidnap_probability: float = 0.) -> None:
+    """Runs a simulation with random actions and writes the inputs of its localization to a log.
+
+    Args:
+        simulation (Simulation): the simulation.
+        path (str): the path of the log file.
+        steps (int): the number of steps.
+        kidnap_probability (float, optional): the probability of kidnapping the robot at each step. Defaults to 0.
+    """
+    robot = simulation.robot
+    num_beams = getattr(simulation.sensor, 'num_beams', 1)
+    tiles = free_tiles(simulation.world)
+
+    with LogWriter(path, num_beams, sim_type=simulation.sim_type, environment=ENVIRONMENT, scale=SCALE) as writer:
+        localization = robot.localization
+        robot.localization = RecordingLocalization(localization, writer, robot)
+        try:
+            for _ in range(steps):
+                if np.random.random() < kidnap_probability:
+                    kidnap(simulation, tiles)
+                simulation.step()
+        finally:
+            robot.localization = localization
@@ -0,0 +1,78 @@
+"""
+Binary logs of the inputs of a localization: a small JSON header followed by fixed-size records of the
+actions of the robot, the readings of its sensor and the true pose of the robot. A log can be memory
+mapped, and read without importing the definitions (e.g. to set them up from its header).
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+from typing import Tuple
+
+import numpy as np
+
+MAGIC = b'LOCLOG'
+VERSION = 1
+# magic, version, length of the JSON metadata
+HEADER = struct.Struct('<6sBI')
+
+"""
+Action code of the records where the robot was kidnapped, instead of acting and seeing.
+"""
+KIDNAPPED = 255
+
+
+def record_dtype(num_beams: int) -> np.dtype:
+    """The dtype of the records of a log: the action code, the reading of each beam,
+    and the true pose of the robot (x and y in tiles, orientation) after the action.
+    """
+    return np.dtype([('action', np.uint8), ('reading', np.float32, (num_beams,)), ('pose', np.float32, (3,))])
+
+
+class LogWriter:
+    """Appends records to a log file. Use as a context manager, or call close().
+    """
+
+    def __init__(self, path: str, num_beams: int = 1, **metadata) -> None:
+        """
+        Args:
+            path (str): the path of the log file, overwritten if it exists.
+            num_beams (int, optional): the number of beams of the readings. Defaults to 1.
+            metadata: JSON serializable information stored in the header, e.g. the environment.
+        """
+        self.dtype = record_dtype(num_beams)
+        self.file = open(path, 'wb')
+
+        encoded = json.dumps({'num_beams': num_beams, **metadata}).encode()
+        self.file.write(HEADER.pack(MAGIC, VERSION, len(encoded)) + encoded)
+
+    def write(self, action: int, reading, pose: Tuple[float, float, int]) -> None:
+        record = np.empty(1, dtype=self.dtype)
+        record['action'], record['reading'], record['pose'] = action, np.reshape(reading, -1), pose
+        self.file.write(record.tobytes())
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> LogWriter:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def read_log(path: str) -> Tuple[dict, np.ndarray]:
+    """Memory maps a log.
+
+    Returns:
+        Tuple[dict, np.ndarray]: the metadata of the header, and the (N,) structured array of the records.
+    """
+    with open(path, 'rb') as f:
+        magic, version, length = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a localization log of version {VERSION}")
+        metadata = json.loads(f.read(length))
+
+    records = np.memmap(path, dtype=record_dtype(metadata['num_beams']), mode='r', offset=HEADER.size + length)
+    return metadata, records
@@ -0,0 +1,74 @@
+"""
+Fixed timestep scheduling of a simulation, independent of the rate at which it is rendered: the
+simulation advances by steps of a fixed duration, as many as the elapsed time requires, while the
+display redraws at whatever rate it can, skipping frames when the simulation falls behind.
+"""
+
+import time
+from typing import Callable, Optional
+
+
+class FixedStepScheduler:
+    """Runs the steps of a simulation at a fixed rate, or as fast as possible, when ticked by a clock
+    (e.g. pyglet.clock.schedule_interval(scheduler.tick, ...)).
+    """
+
+    def __init__(self, step: Callable[[], None], rate: Optional[float], budget: float = 1 / 15,
+                 max_lag: float = 0.25, max_skipped_frames: int = 4) -> None:
+        """
+        Args:
+            step (Callable[[], None]): runs one step of the simulation.
+            rate (float, optional): the number of steps per second, None to step as fast as possible.
+            budget (float, optional): the wall time in seconds a tick may spend stepping. Defaults to 1/15.
+            max_lag (float, optional): the time in seconds the simulation may lag behind, the steps of a
+            longer lag are dropped rather than caught up with. Defaults to 0.25.
+            max_skipped_frames (int, optional): the number of frames in a row that can be skipped while the
+            simulation is behind. Defaults to 4.
+        """
+        self.step = step
+        self.period = 1 / rate if rate else None
+        self.budget = budget
+        self.max_lag = max_lag
+        self.max_skipped_frames = max_skipped_frames
+
+        # simulated time due but not stepped yet
+        self.lag = 0.
+        # whether steps were due after the last tick
+        self.behind = False
+        self.skipped_frames = 0
+        self.steps = 0
+
+    def tick(self, dt: float) -> int:
+        """Runs the steps due after dt more seconds, within the budget.
+
+        Returns:
+            int: the number of steps run.
+        """
+        start = time.perf_counter()
+        steps = 0
+
+        if self.period is None:
+            while not steps or time.perf_counter() - start < self.budget:
+                self.step()
+                steps += 1
+        else:
+            self.lag = min(self.lag + dt, self.max_lag)
+            while self.lag >= self.period and time.perf_counter() - start < self.budget:
+                self.step()
+                self.lag -= self.period
+                steps += 1
+            self.behind = self.lag >= self.period
+
+        self.steps += steps
+        return steps
+
+    def should_render(self) -> bool:
+        """Whether a frame should be rendered, False while the simulation is behind, unless too many frames
+        were skipped in a row.
+        """
+        if self.behind and self.skipped_frames < self.max_skipped_frames:
+            self.skipped_frames += 1
+            return False
+
+        self.skipped_frames = 0
+        return True
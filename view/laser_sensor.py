@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional, Tuple
 
 import numpy as np
 import pyglet
@@ -12,7 +12,7 @@ from model.sensors import LaserSensor
 
 class LaserSensorView(Observer):
     """
-    View for Laser Sensors. The laser is visualized with a line and the intersection with a star.
+    View for Laser Sensors. Each beam is visualized with a line and its intersection with a star.
     """
 
     def __init__(self, robot: RobotBase, laser: LaserSensor, batch: pyglet.graphics.Batch):
@@ -23,46 +23,43 @@ class LaserSensorView(Observer):
         self.laser_color = (124, 252, 0)
         self.intersection_color = (255, 255, 0)
 
-        self.laser_beam_line: Optional[shapes.Line] = None
-        self.intersection_star: Optional[shapes.Star] = None
+        self.laser_beam_lines: List[shapes.Line] = []
+        self.intersection_stars: List[shapes.Star] = []
 
-        self.robot.on_move.subscribe(self)
+        self.robot.on_move.subscribe(self, deferred=True)
         self.update()
 
     def update(self) -> None:
-        self._draw_intersection()
+        # single beam sensors only expose the intersection of their beam
+        intersections = getattr(self.laser, 'intersections', [self.laser.intersection])
 
-        if self.laser_beam_line is not None:
-            self.laser_beam_line.delete()
+        self._draw_intersections(intersections)
 
-        end_xy = self.laser.intersection if self.laser.intersection is not None else self._get_endpoint()
+        start_xy = (self.robot.position + ROBOT_SIZE) * TILE_SIZE
+        endpoints = self._get_endpoints()
+        while len(self.laser_beam_lines) < len(intersections):
+            self.laser_beam_lines.append(shapes.Line(0, 0, 0, 0, width=1, color=self.laser_color, batch=self.batch))
 
-        self.laser_beam_line = shapes.Line(
-            *(self.robot.position + ROBOT_SIZE) * TILE_SIZE,
-            *end_xy, width=1,
-            color=self.laser_color, batch=self.batch
-        )
+        for line, intersection, end_xy in zip(self.laser_beam_lines, intersections, endpoints):
+            line.x, line.y = start_xy
+            line.x2, line.y2 = intersection if intersection is not None else end_xy
 
-    def _get_endpoint(self):
-        rot_deg = -self.laser.rotations[self.robot.orientation.value]
-        y_rot_direction = np.array([np.sin(np.deg2rad(rot_deg)), np.cos(np.deg2rad(rot_deg))])
-        vec = y_rot_direction * self.laser.sensor_length
+    def _get_endpoints(self) -> np.ndarray:
+        vec = self.laser.beam_vectors(self.robot.orientation) * self.laser.sensor_length
 
         return (self.robot.position + ROBOT_SIZE) * TILE_SIZE + vec
 
-    def _draw_intersection(self):
-        # remove old intersection
-        if self.intersection_star is not None:
-            self.intersection_star.delete()
-            self.intersection_star = None
-
-        # if there is no new intersection, return
-        if self.laser.intersection is None:
-            return
-
-        # create star at intersection
-        ix, iy = self.laser.intersection
-        self.intersection_star = shapes.Star(
-            ix, iy, outer_radius=TILE_SIZE / 2, inner_radius=TILE_SIZE / 10,
-            num_spikes=10, color=self.intersection_color, batch=self.batch
-        )
+    def _draw_intersections(self, intersections: List[Optional[Tuple[float, float]]]):
+        hits = [intersection for intersection in intersections if intersection is not None]
+
+        # the stars are kept across updates, those without an intersection are hidden
+        while len(self.intersection_stars) < len(hits):
+            self.intersection_stars.append(shapes.Star(
+                0, 0, outer_radius=TILE_SIZE / 2, inner_radius=TILE_SIZE / 10,
+                num_spikes=10, color=self.intersection_color, batch=self.batch
+            ))
+
+        for k, star in enumerate(self.intersection_stars):
+            star.visible = k < len(hits)
+            if star.visible:
+                star.position = hits[k]
@@ -0,0 +1,204 @@
+"""
+Matplotlib figures of the state of a localization, drawn live (see LocalizationBeliefView) or offline
+from a recorded history (see simulation/recorder.py and plot_history.py).
+"""
+
+import multiprocessing
+import os
+import threading
+import warnings
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+
+import matplotlib
+import numpy as np
+import seaborn as sns
+from PIL import Image
+from matplotlib import pyplot as plt
+from scipy.ndimage import rotate
+
+from base.robot import RobotBase
+
+
+class BeliefFigure:
+    """A 3 x 3 figure with a heatmap of the belief of each orientation, around the robot facing its true
+    orientation. The figure, its axes and its heatmaps are created once, and redrawn with each new belief.
+    """
+
+    """
+    Orientation shown by each axes of the figure, None for the robot in the middle.
+    """
+    INDICES = [
+        [7, 0, 1],
+        [6, None, 2],
+        [5, 4, 3]
+    ]
+
+    def __init__(self, width: int, height: int) -> None:
+        """
+        Args:
+            width (int): the width of the beliefs in tiles.
+            height (int): the height of the beliefs in tiles.
+        """
+        colormap = sns.color_palette("PuBuGn", as_cmap=True)
+        self.figure, ax = plt.subplots(3, 3, figsize=(12, 12))
+
+        # the rotated image of the robot, per orientation
+        self.texture = np.asarray(Image.open("textures/walle.png"))
+        self.robot_images: Dict[int, np.ndarray] = {}
+
+        self.heatmaps = {}
+        for i in range(3):
+            for j in range(3):
+                idx = self.INDICES[i][j]
+                if idx is None:
+                    self.robot = ax[i, j].imshow(self.robot_image(0))
+                    ax[i, j].axis("off")
+                    continue
+                heatmap = ax[i, j].pcolormesh(np.zeros((height, width)), cmap=colormap,
+                                              edgecolors='white', linewidth=0.1)
+                self.figure.colorbar(heatmap, ax=ax[i, j])
+                ax[i, j].title.set_text(RobotBase.Direction(idx).name.replace("_", " "))
+                self.heatmaps[idx] = heatmap
+
+    def robot_image(self, orientation: int) -> np.ndarray:
+        if orientation not in self.robot_images:
+            self.robot_images[orientation] = rotate(self.texture, -45 - 45 * orientation, reshape=False)
+        return self.robot_images[orientation]
+
+    def draw(self, belief: np.ndarray, orientation: int) -> None:
+        """
+        Args:
+            belief (np.ndarray): (width, height, 8) probabilities of the poses.
+            orientation (int): the index of the true orientation of the robot (see RobotBase.Direction).
+        """
+        for idx, heatmap in self.heatmaps.items():
+            probabilities = belief[:, :, idx].T
+            heatmap.set_array(probabilities.ravel())
+            heatmap.set_clim(probabilities.min(), probabilities.max())
+        self.robot.set_data(self.robot_image(orientation))
+
+    def save(self, path: str) -> None:
+        # write to a temporary file first, so that the file never holds a partial image
+        directory, name = os.path.split(path)
+        temporary = os.path.join(directory, f".{name}")
+        self.figure.savefig(temporary, format=os.path.splitext(name)[1][1:] or 'png')
+        os.replace(temporary, path)
+
+
+def plot_8_orientations(belief: np.ndarray, orientation: int, path: Optional[str] = None) -> plt.Figure:
+    """Draws the belief of each orientation on a new BeliefFigure.
+
+    Args:
+        belief (np.ndarray): (width, height, 8) probabilities of the poses.
+        orientation (int): the index of the true orientation of the robot (see RobotBase.Direction).
+        path (str, optional): the file where the figure is saved. Defaults to None, not saving it.
+    """
+    plt.close()
+    figure = BeliefFigure(*belief.shape[:2])
+    figure.draw(belief, orientation)
+    if path is not None:
+        figure.save(path)
+    return figure.figure
+
+
+# figure reused by the successive plots of a PlotWorker process
+_belief_figure: Optional[BeliefFigure] = None
+
+
+def _init_plot_worker() -> None:
+    matplotlib.use('Agg')
+
+
+def _plot_belief(belief: np.ndarray, orientation: int, path: str) -> None:
+    global _belief_figure
+    if _belief_figure is None:
+        _belief_figure = BeliefFigure(*belief.shape[:2])
+    _belief_figure.draw(belief, orientation)
+    _belief_figure.save(path)
+
+
+class PlotWorker:
+    """Plots beliefs on a BeliefFigure in a background process, so that the caller never waits for the plots.
+    Only the latest belief submitted while a plot is being drawn is plotted next, the others are dropped.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): the file where the plots are saved, each plot replacing the previous one.
+        """
+        self.path = path
+        context = multiprocessing.get_context('spawn')
+        self.executor: Optional[ProcessPoolExecutor] = ProcessPoolExecutor(max_workers=1,
+                                                                           mp_context=context,
+                                                                           initializer=_init_plot_worker)
+        self.lock = threading.RLock()
+        self.running: Optional[Future] = None
+        self.pending: Optional[Tuple[np.ndarray, int]] = None
+
+    def submit(self, belief: np.ndarray, orientation: int) -> None:
+        """Plots the belief as soon as the worker is idle. The belief must not be modified afterwards.
+        """
+        with self.lock:
+            if self.executor is None:
+                return
+            if self.running is None:
+                self._start(belief, orientation)
+            else:
+                self.pending = belief, orientation
+
+    def _start(self, belief: np.ndarray, orientation: int) -> None:
+        try:
+            self.running = self.executor.submit(_plot_belief, belief.astype(np.float32), orientation, self.path)
+        except BrokenProcessPool:
+            # the worker died, e.g. killed, give up plotting rather than interrupting the simulation
+            warnings.warn("The plotting process terminated, no more plots are generated")
+            self.executor, self.running = None, None
+            return
+        self.running.add_done_callback(self._done)
+
+    def _done(self, future: Future) -> None:
+        if future.exception() is not None:
+            warnings.warn(f"Plotting the belief failed: {future.exception()!r}")
+
+        with self.lock:
+            self.running = None
+            if self.pending is not None and self.executor is not None:
+                belief, orientation = self.pending
+                self.pending = None
+                self._start(belief, orientation)
+
+    def close(self) -> None:
+        with self.lock:
+            executor, self.executor, self.pending = self.executor, None, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def plot_particles(particles: np.ndarray, position: np.ndarray, width: float, height: float,
+                   path: Optional[str] = None) -> plt.Figure:
+    """Draws the particles, colored by heading and with the opacity of their weight, and the true position.
+
+    Args:
+        particles (np.ndarray): (N,) particles with the fields x, y (in pixels), heading and weight.
+        position (np.ndarray): the true position of the center of the robot in pixels.
+        width (float): the width of the world in pixels.
+        height (float): the height of the world in pixels.
+        path (str, optional): the file where the figure is saved. Defaults to None, not saving it.
+    """
+    plt.close()
+    fig, ax = plt.subplots(figsize=(12, 12 * height / width))
+
+    colors = plt.get_cmap('hsv')(particles['heading'] / len(RobotBase.Direction))
+    colors[:, 3] = (particles['weight'] / particles['weight'].max()) ** 0.1
+    ax.scatter(particles['x'], particles['y'], c=colors, s=10)
+    ax.scatter([position[0]], [position[1]], marker='*', s=200, c='black')
+    ax.set_xlim(0, width)
+    ax.set_ylim(0, height)
+    ax.set_aspect('equal')
+
+    if path is not None:
+        fig.savefig(path)
+    return fig
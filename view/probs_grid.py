@@ -1,79 +1,61 @@
 import numpy as np
 import pyglet.graphics
-import seaborn as sns
-from PIL import Image
-from matplotlib import pyplot as plt
-from scipy.ndimage import rotate
+from pyglet import image, sprite
+from pyglet.gl import GL_NEAREST
 
 from base.observer_pattern import Observer
 from base.robot import RobotBase
-from base.shapes import DisplayableRectangle
 from definitions import GENERATE_PLOTS
 from model.grid_world import GridWorld
+from view.plots import PlotWorker
 
 
 class LocalizationBeliefView(Observer):
     '''
     View of probabilities (pose belief) on the grid of possible poses.
+    The belief is drawn as a single texture with one texel per tile, stretched over the grid.
     '''
 
     def __init__(self, robot: RobotBase, world: GridWorld, batch: pyglet.graphics.Batch) -> None:
         self.robot = robot
         self.world = world
 
-        self.tiles = np.empty_like(world.walkable, dtype=object)
-
-        # print(walkable.shape)
         color = (0, 0, 255)
-        tile_size = world.tile_size
-        for i in range(world.width):
-            for j in range(world.height):
-                if world.walkable[i, j]:
-                    self.tiles[i, j] = DisplayableRectangle(
-                        i * tile_size + 1, j * tile_size + 1, tile_size - 2, tile_size - 2,
-                        color=color, batch=batch)
-
-        self.robot.on_move.subscribe(self)
 
-    def update(self) -> None:
-        self.color_tiles_according_to_localization_beliefs()
-        if GENERATE_PLOTS:
-            self.plot_8_orientations()
+        # (height, width, 4) image of the belief, its rows going upwards, transparent on obstacles
+        self.pixels = np.zeros((world.height, world.width, 4), dtype=np.uint8)
+        self.pixels[:, :, :3] = color
+        # opacity of a tile of probability 1, 0 on obstacles
+        self.max_opacity = np.where(world.walkable.T, 255, 0).astype(np.float32)
 
-    def color_tiles_according_to_localization_beliefs(self):
-        # sum probabilities over the rotation dimension
-        robot_probs_sum = self.robot.localization.belief.sum(axis=2)
+        self.image = image.ImageData(world.width, world.height, 'RGBA', self.pixels.tobytes())
+        self.texture = image.Texture.create(world.width, world.height, min_filter=GL_NEAREST, mag_filter=GL_NEAREST)
+        self.sprite = sprite.Sprite(self.texture, batch=batch)
+        self.sprite.scale = world.tile_size
 
-        # for each walkable tile, change the opacity by rescaling it
-        # from (min_prob, max_prob) to (0,255)
-        for i in range(self.world.width):
-            for j in range(self.world.height):
-                if self.tiles[i, j]:
-                    new_opacity = robot_probs_sum[i, j] ** 0.1
-                    self.tiles[i, j].opacity = int(new_opacity * 255)
+        # the plots are drawn by a background process, never delaying the simulation
+        self.plot_worker = PlotWorker("plots/probs.png") if GENERATE_PLOTS else None
 
-    def plot_8_orientations(self):
-        plt.close()
-        colormap = sns.color_palette("PuBuGn", as_cmap=True)
-        fig, ax = plt.subplots(3, 3, figsize=(12, 12))
+        self.robot.on_move.subscribe(self, deferred=True)
 
-        indices = [
-            [7, 0, 1],
-            [6, None, 2],
-            [5, 4, 3]
-        ]
-        for i in range(3):
-            for j in range(3):
-                if i == 1 and j == 1:
-                    img = np.asarray(Image.open("textures/walle.png"))
-                    img = rotate(img, -45 - 45 * self.robot.orientation.value, reshape=False)
-                    ax[i, j].imshow(img)
-                    ax[i, j].axis("off")
-                    continue
-                idx = indices[i][j]
-                sns.heatmap(self.robot.localization.belief[:, :, idx].T, ax=ax[i, j], linewidths=0.1, cmap=colormap)
-                ax[i, j].title.set_text(self.robot.Direction(idx).name.replace("_", " "))
-
-                ax[i, j].invert_yaxis()
-        fig.savefig("plots/probs.png")
-        # fig.show()
+    def update(self) -> None:
+        belief = self.robot.localization.belief
+        self.color_tiles_according_to_localization_beliefs(belief)
+        if self.plot_worker is not None:
+            self.plot_worker.submit(belief, self.robot.orientation.value)
+
+    def close(self) -> None:
+        # waits for the plot being drawn and stops the plotting process
+        if self.plot_worker is not None:
+            self.plot_worker.close()
+
+    def color_tiles_according_to_localization_beliefs(self, belief: np.ndarray):
+        # sum probabilities over the rotation dimension, and rescale them from (0, 1) to opacities in (0, 255)
+        robot_probs_sum = belief.sum(axis=2).T.astype(np.float32)
+        np.clip(robot_probs_sum, 0, 1, out=robot_probs_sum)
+        np.power(robot_probs_sum, 0.1, out=robot_probs_sum)
+        np.multiply(robot_probs_sum, self.max_opacity, out=robot_probs_sum)
+        self.pixels[:, :, 3] = robot_probs_sum
+
+        self.image.set_data('RGBA', self.world.width * 4, self.pixels.tobytes())
+        self.texture.blit_into(self.image, 0, 0, 0)
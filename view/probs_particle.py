@@ -1,31 +1,129 @@
+import numpy as np
 import pyglet.graphics
-from pyglet import shapes
+from pyglet.gl import GL_BLEND, GL_ONE_MINUS_SRC_ALPHA, GL_SRC_ALPHA, GL_TRIANGLES, glBlendFunc, glDisable, glEnable
+from pyglet.graphics.shader import Shader, ShaderProgram
 
 from base.observer_pattern import Observer
 from definitions import PARTICLE_SIZE
 from model.localization import MonteCarloLocalization
 from model.robots.continuous_robot import ContinuousRobot
 
+vertex_source = """#version 150 core
+    in vec2 position;
+    in vec2 corner;
+    in vec4 colors;
+
+    out vec2 vertex_corner;
+    out vec4 vertex_colors;
+
+    uniform WindowBlock
+    {
+        mat4 projection;
+        mat4 view;
+    } window;
+
+    void main()
+    {
+        gl_Position = window.projection * window.view * vec4(position, 0.0, 1.0);
+        vertex_corner = corner;
+        vertex_colors = colors;
+    }
+"""
+
+fragment_source = """#version 150 core
+    in vec2 vertex_corner;
+    in vec4 vertex_colors;
+    out vec4 final_color;
+
+    void main()
+    {
+        // cut the circle of the particle out of its square
+        if (dot(vertex_corner, vertex_corner) > 1.0) {
+            discard;
+        }
+        final_color = vertex_colors;
+    }
+"""
+
+"""
+Corners of the two triangles of the square of a particle, relative to its center and radius.
+"""
+CORNERS = np.array([[-1, -1], [1, -1], [1, 1], [-1, -1], [1, 1], [-1, 1]], dtype=np.float32)
+
+
+class ParticleGroup(pyglet.graphics.Group):
+    def __init__(self, program: ShaderProgram, order: int = 0, parent: pyglet.graphics.Group = None) -> None:
+        super().__init__(order, parent)
+        self.program = program
+
+    def set_state(self) -> None:
+        self.program.use()
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+
+    def unset_state(self) -> None:
+        glDisable(GL_BLEND)
+        self.program.stop()
+
 
 class ParticleView(Observer):
+    """
+    View of the particles of a Monte Carlo localization, as circles whose opacity grows with their weight.
+    All the particles are drawn from a single vertex list, written from the particle arrays at each update.
+    """
+
     def __init__(self, localization: MonteCarloLocalization, robot: ContinuousRobot,
                  batch: pyglet.graphics.Batch) -> None:
         self.localization = localization
         self.robot = robot
-        self.robot.on_move.subscribe(self)
-        self.particle_shapes = []
+        self.robot.on_move.subscribe(self, deferred=True)
         self.batch = batch
 
+        self.color = (0, 0, 255)
+        self.program = ShaderProgram(Shader(vertex_source, 'vertex'), Shader(fragment_source, 'fragment'))
+        self.group = ParticleGroup(self.program)
+
+        # number of particles the vertex list can hold, and number of particles drawn
+        self.capacity = 0
+        self.count = 0
+        self.vertex_list = None
+
         self.update()
 
     def update(self) -> None:
         self.draw_particles()
 
     def draw_particles(self):
-        self.particle_shapes.clear()
+        particles = self.localization.particles
+        count = len(particles)
+        if count > self.capacity:
+            self._allocate(max(count, 2 * self.capacity))
+
+        position = np.empty((count, len(CORNERS), 2), dtype=np.float32)
+        position[:, :, 0] = particles.x[:, None]
+        position[:, :, 1] = particles.y[:, None]
+        position += CORNERS * PARTICLE_SIZE
+
+        colors = np.empty((count, len(CORNERS), 4), dtype=np.float32)
+        colors[:, :, :3] = np.array(self.color, dtype=np.float32) / 255
+        colors[:, :, 3] = (particles.weight ** 0.1)[:, None]
+
+        size = count * len(CORNERS)
+        np.ctypeslib.as_array(self.vertex_list.position)[:2 * size] = position.ravel()
+        np.ctypeslib.as_array(self.vertex_list.colors)[:4 * size] = colors.ravel()
+        if count < self.count:
+            # collapse the squares of the particles that are gone
+            np.ctypeslib.as_array(self.vertex_list.position)[2 * size:2 * self.count * len(CORNERS)] = 0
+
+        self.count = count
+
+    def _allocate(self, capacity: int) -> None:
+        if self.vertex_list is not None:
+            self.vertex_list.delete()
 
-        for particle in self.localization.particles:
-            color = (0, 0, 255)
-            particle_shape = shapes.Circle(particle.x, particle.y, PARTICLE_SIZE, color=color, batch=self.batch)
-            particle_shape.opacity = int(particle.weight ** 0.1 * 255)
-            self.particle_shapes.append(particle_shape)
+        self.vertex_list = self.program.vertex_list(capacity * len(CORNERS), GL_TRIANGLES, batch=self.batch,
+                                                    group=self.group, position='f', corner='f', colors='f')
+        np.ctypeslib.as_array(self.vertex_list.position)[:] = 0
+        np.ctypeslib.as_array(self.vertex_list.corner)[:] = np.tile(CORNERS.ravel(), capacity)
+        self.capacity = capacity
+        self.count = 0
@@ -13,19 +13,22 @@ class RobotView(Observer):
         self.batch = batch
 
         self.color = (255, 18, 18)
-        self.sprite = None
 
         self.sprite_texture = image.load('./textures/robot.png').get_texture()
         self.sprite_texture.anchor_x = self.sprite_texture.width // 2
         self.sprite_texture.anchor_y = self.sprite_texture.height // 2
 
+        # a single sprite, moved and rotated at each update
+        self.sprite = sprite.Sprite(self.sprite_texture, batch=self.batch)
+        self.sprite.scale = .2 * SCALE
+
         self.display_position = self.robot.position.copy().astype(float)
         self.moving = False
         self.allow_move = True
-        self.dt = SPEED / FPS
+        self.dt = SPEED / SIM_RATE
         self.dt = min(self.dt, 1.)
 
-        self.robot.on_move.subscribe(self)
+        self.robot.on_move.subscribe(self, deferred=True)
         self.update()
 
     # def update_moving(self):
@@ -62,11 +65,4 @@ class RobotView(Observer):
         self.draw_robot(x, y, self.robot.orientation)
 
     def draw_robot(self, x: float, y: float, direction: RobotBase.Direction) -> None:
-        if self.sprite is not None:
-            self.sprite.delete()
-
-        self.sprite = sprite.Sprite(self.sprite_texture, x=x, y=y, batch=self.batch)
-
-        self.sprite.scale = .2 * SCALE
-
-        self.sprite.rotation = direction.value * 45
+        self.sprite.update(x=x, y=y, rotation=direction.value * 45)
@@ -0,0 +1,52 @@
+from pyglet import shapes, image, sprite
+
+from base.shapes import Rectangle, Obstacle, Circle, Polygon
+
+
+class DisplayableRectangle(shapes.Rectangle):
+
+    @classmethod
+    def from_shape(cls, shape: Rectangle, batch=None, group=None):
+        return cls(shape.x, shape.y, shape.width, shape.height, color=shape.color, batch=batch, group=group)
+
+
+class DisplayableObstacle(DisplayableRectangle):
+    def __init__(self, x, y, width, height, color=(255, 255, 255), textured=True, batch=None, group=None):
+        super().__init__(x, y, width, height, color, batch, group)
+
+        self.sprite = None
+        self.batch = batch
+        if textured:
+            self.load_texture()
+
+    @classmethod
+    def from_shape(cls, shape: Obstacle, batch=None, group=None):
+        return cls(shape.x, shape.y, shape.width, shape.height, color=shape.color, textured=shape.textured,
+                   batch=batch, group=group)
+
+    def load_texture(self):
+        original_texture = image.load('./textures/brick_wall.jpg').get_texture()
+
+        # Here, we make the assumption that the size of the texture
+        # is greater than or equal to the size of the rectangle.
+        cropped_texture = original_texture.get_region(0, 0, original_texture.width, original_texture.height)
+
+        self.sprite = sprite.Sprite(cropped_texture, x=self.x, y=self.y, batch=self.batch)
+        self.opacity = 0
+
+        self.sprite.scale_x = self.width / original_texture.width
+        self.sprite.scale_y = self.height / original_texture.height
+
+
+class DisplayableCircle(shapes.Circle):
+
+    @classmethod
+    def from_shape(cls, shape: Circle, batch=None, group=None):
+        return cls(shape.x, shape.y, shape.radius, shape.segments, color=shape.color, batch=batch, group=group)
+
+
+class DisplayablePolygon(shapes.Polygon):
+
+    @classmethod
+    def from_shape(cls, shape: Polygon, batch=None, group=None):
+        return cls(*shape.coordinates, color=shape.color, batch=batch, group=group)
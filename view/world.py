@@ -0,0 +1,24 @@
+import pyglet.graphics
+
+from base.shapes import Rectangle, Obstacle, Circle, Polygon
+from view.shapes import DisplayableRectangle, DisplayableObstacle, DisplayableCircle, DisplayablePolygon
+
+
+class WorldView:
+    """
+    View of the objects of a world (obstacles and walls). The objects do not move,
+    so their displayable shapes are created once.
+    """
+
+    displayable_types = {
+        Rectangle: DisplayableRectangle,
+        Obstacle: DisplayableObstacle,
+        Circle: DisplayableCircle,
+        Polygon: DisplayablePolygon
+    }
+
+    def __init__(self, world, batch: pyglet.graphics.Batch) -> None:
+        self.world = world
+        self.displayables = [
+            self.displayable_types[type(obj)].from_shape(obj, batch=batch) for obj in world.objects
+        ]